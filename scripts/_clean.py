@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Response clean-up shared by the benchmark scripts
+"""
+import re
+
+# Opening ```/```json fence at the start, closing ``` at the end
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*|\s*```\s*$")
+
+def strip_fences(text: str) -> str:
+    """Remove a markdown code fence wrapped around a response
+
+    Most responses carry no fence at all, so those skip the regex entirely.
+    A fence that was opened but never closed (truncated output) is still removed.
+    """
+    text = text.strip()
+    if not text.startswith("```") and not text.endswith("```"):
+        return text
+    return _FENCE_RE.sub("", text).strip()
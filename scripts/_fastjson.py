@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+JSON encoding shared by the benchmark scripts
+Uses orjson when it is installed (pip install orjson), stdlib json otherwise
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup - stdlib json works too
+    orjson = None
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes
+
+    Invalid input raises json.JSONDecodeError either way - orjson's error subclasses it.
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialise to UTF-8 JSON: one compact line, or indented by 2 spaces with indent"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(data, indent=2 if indent else None).encode()
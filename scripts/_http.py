@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Shared AsyncOpenAI clients for the benchmark scripts
+One pooled keep-alive connection set per endpoint, reused by every request
+"""
+from __future__ import annotations
+
+import time
+import importlib.util
+from typing import TYPE_CHECKING, Any, Dict, Optional, Protocol, Tuple
+
+from _retry import resilient_chat
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+# HTTP/2 multiplexing needs the optional h2 package (pip install 'httpx[http2]')
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+MAX_CONNECTIONS = 64
+
+_CLIENTS: Dict[Tuple[str, str, int], AsyncOpenAI] = {}
+
+class RateLimiter(Protocol):
+    """Request-rate limiter stream_chat consults around each attempt"""
+
+    async def acquire(self): ...
+    def update_from_headers(self, headers: httpx.Headers): ...
+
+def get_async_client(api_key: str, base_url: str, max_retries: int = 0) -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for an endpoint, creating it on first use
+
+    The SDK's own retries are off by default: stream_chat retries through _retry,
+    and stacking the two would multiply the attempts.
+    """
+    key = (api_key, base_url, max_retries)
+
+    if key not in _CLIENTS:
+        from openai import AsyncOpenAI
+
+        _CLIENTS[key] = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=max_retries,
+            **_connection_options(),
+        )
+
+    return _CLIENTS[key]
+
+def _connection_options() -> Dict[str, Any]:
+    """AsyncOpenAI keyword arguments for the connection pool
+
+    A sized pool (and HTTP/2 when h2 is installed) needs httpx itself, which not every
+    openai release depends on; without it the SDK's default pool is used as is.
+    """
+    from openai import DefaultAsyncHttpxClient
+
+    try:
+        import httpx
+    except ImportError:
+        return {"timeout": 60}
+    if not issubclass(DefaultAsyncHttpxClient, httpx.AsyncClient):
+        # The SDK is built on another HTTP library, which won't take httpx's settings
+        return {"timeout": 60}
+
+    return {"http_client": DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        http2=HTTP2,
+        timeout=httpx.Timeout(60, connect=5),
+    )}
+
+async def close_async_clients():
+    """Close every shared client and its connection pool"""
+    for client in _CLIENTS.values():
+        await client.close()
+    _CLIENTS.clear()
+
+@resilient_chat
+async def stream_chat(client: AsyncOpenAI, *, limiter: Optional[RateLimiter] = None, **request) -> Dict[str, Any]:
+    """Stream one chat completion, timing the first content token and the whole response
+
+    Returns {"content", "prompt_tokens", "completion_tokens", "ttft", "elapsed", "attempts"},
+    times in seconds. Rate limits, 5xx errors and dropped connections are retried (see
+    _retry); the times cover the successful attempt only. A limiter, when given, is
+    acquired before every attempt and fed each response's rate-limit headers.
+    """
+    if limiter:
+        await limiter.acquire()
+
+    start = time.perf_counter_ns()  # monotonic, so NTP clock adjustments can't skew latencies
+    raw = await client.chat.completions.with_raw_response.create(
+        stream=True,
+        stream_options={"include_usage": True},
+        **request,
+    )
+    if limiter:
+        limiter.update_from_headers(raw.headers)
+
+    parts = []
+    ttft = None
+    usage = None
+    async for chunk in raw.parse():
+        # The final chunk carries usage and no choices
+        if chunk.usage:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            if ttft is None:
+                ttft = (time.perf_counter_ns() - start) / 1e9
+            parts.append(chunk.choices[0].delta.content)
+
+    return {
+        "content": "".join(parts),
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "completion_tokens": usage.completion_tokens if usage else 0,
+        "ttft": ttft,
+        "elapsed": (time.perf_counter_ns() - start) / 1e9,
+    }
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Retry policy shared by the benchmark scripts
+Rate limits (429), 5xx gateway errors, timeouts and dropped connections are
+retried with jittered exponential backoff, honoring the server's Retry-After
+"""
+from __future__ import annotations
+
+import time
+import functools
+from typing import TYPE_CHECKING, Optional
+
+# tenacity is imported where it is used, so importing this module stays fast
+if TYPE_CHECKING:
+    from tenacity import AsyncRetrying, RetryCallState
+
+MAX_ATTEMPTS = 5
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 60  # seconds; longer server-requested waits are capped
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an API error is worth retrying: connection failures, timeouts, 429 and 5xx gateway errors"""
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRY_STATUS_CODES
+    return isinstance(error, APIConnectionError)  # includes APITimeoutError
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait via Retry-After, if it said"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        # HTTP-date form
+        from email.utils import parsedate_to_datetime
+
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+def _log_retry(label: str, retry_state: RetryCallState):
+    """Report a retry before tenacity sleeps"""
+    error = retry_state.outcome.exception()
+    print(f"   ↻ {label}: attempt {retry_state.attempt_number} failed ({type(error).__name__}), "
+          f"retrying in {retry_state.next_action.sleep:.1f}s")
+
+def retrying(label: str) -> AsyncRetrying:
+    """Build the AsyncRetrying loop for one API call; label names it in retry messages"""
+    from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+    backoff = wait_exponential_jitter(initial=1, max=30)
+
+    def wait(retry_state: RetryCallState) -> float:
+        # Honor the server's Retry-After when given, otherwise back off with jitter
+        delay = retry_after(retry_state.outcome.exception())
+        return backoff(retry_state) if delay is None else delay
+
+    return AsyncRetrying(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=wait,
+        retry=retry_if_exception(is_transient),
+        before_sleep=lambda retry_state: _log_retry(label, retry_state),
+        reraise=True,
+    )
+
+def resilient_chat(func):
+    """Decorate an async API call so transient failures are retried
+
+    The model keyword argument, when given, labels the retry messages. The backoff
+    sleeps inside whatever semaphore the caller holds, so retries never push the
+    number of requests in flight past its limit. The number of attempts made is
+    recorded as "attempts" on a dict result, or on the exception if every attempt
+    failed, so flaky and hard failures can be told apart.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        attempts = 0
+        try:
+            async for attempt in retrying(kwargs.get("model", func.__name__)):
+                with attempt:
+                    attempts = attempt.retry_state.attempt_number
+                    result = await func(*args, **kwargs)
+        except Exception as e:
+            e.attempts = attempts
+            raise
+
+        if isinstance(result, dict):
+            result["attempts"] = attempts
+        return result
+
+    return wrapper
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Batch API runner shared by the benchmark scripts (--batch)
+Chat completion requests go out as one asynchronous batch job at reduced cost,
+for sweeps that don't need answers right away. Needs an endpoint that implements
+the OpenAI Batch API (/v1/files + /v1/batches), e.g. api.openai.com via OPENAI_BASE_URL
+"""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict
+
+import _fastjson
+import llm_cache
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+BATCH_POLL_INTERVAL = 30  # seconds
+BATCH_DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def write_batch_input(path: Path, requests: Dict[str, Dict[str, Any]]):
+    """Write one chat completion request per custom_id to a batch JSONL file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        for custom_id, body in requests.items():
+            f.write(_fastjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }) + b"\n")
+
+async def submit_batch(client: AsyncOpenAI, requests_jsonl_path: Path):
+    """Upload a batch input file and start the batch job"""
+    with open(requests_jsonl_path, "rb") as f:
+        batch_file = await client.files.create(file=f, purpose="batch")
+    return await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+async def wait_for_batch(client: AsyncOpenAI, batch_id: str):
+    """Poll a batch job until it reaches a final status"""
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in BATCH_DONE_STATUSES:
+            return batch
+        counts = batch.request_counts
+        done = f" ({counts.completed}/{counts.total} done)" if counts else ""
+        print(f"   ⏳ Batch {batch.status}{done}...")
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+
+def _parse_output_line(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one batch output record into a completion, or {"error": ...} if the request failed"""
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        error = record.get("error") or response.get("body", {}).get("error") or "batch request failed"
+        return {"error": str(error)}
+
+    body = response["body"]
+    usage = body.get("usage") or {}
+    # Batches report no per-request latency, so response times read as 0; "batch" marks
+    # the entry so live runs don't take it from the cache (see llm_cache.load)
+    return {
+        "content": body["choices"][0]["message"]["content"] or "",
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "ttft": None,
+        "elapsed": 0.0,
+        "batch": True,
+    }
+
+async def run_batch(client: AsyncOpenAI, requests: Dict[str, Dict[str, Any]],
+                    input_path: Path) -> Dict[str, Dict[str, Any]]:
+    """Send chat completion bodies (custom_id -> body) as one batch job, returning custom_id -> completion
+
+    Completions have the same shape as llm_cache.cached_chat's. Bodies already in the
+    response cache (live or batch) are answered from it and left out of the job, and
+    fresh results are stored under the same key cached_chat uses, marked as batch
+    results so live runs don't reuse them. A request that failed maps to
+    {"error": ...}; one missing from the output is reported the same way.
+    """
+    keys = {custom_id: llm_cache.cache_key(body) for custom_id, body in requests.items()}
+
+    completions = {}
+    for custom_id, key in keys.items():
+        completion = llm_cache.load(key, include_batch=True)
+        if completion is not None:
+            completions[custom_id] = {**completion, "cached": True}
+
+    todo = {custom_id: body for custom_id, body in requests.items() if custom_id not in completions}
+    if not todo:
+        print(f"   📦 All {len(requests)} requests answered from the response cache")
+        return completions
+
+    write_batch_input(input_path, todo)
+    batch = await submit_batch(client, input_path)
+    print(f"   📦 Submitted batch {batch.id} ({len(todo)} requests, "
+          f"{len(completions)} cached, input: {input_path})")
+
+    batch = await wait_for_batch(client, batch.id)
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+    lines = []
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            lines.extend((await client.files.content(file_id)).text.splitlines())
+
+    for line in lines:
+        if not line.strip():
+            continue
+        record = _fastjson.loads(line)
+        custom_id = record["custom_id"]
+        completion = _parse_output_line(record)
+        if "error" not in completion:
+            llm_cache.store(keys[custom_id], completion)
+            completion = {**completion, "cached": False}
+        completions[custom_id] = completion
+
+    for custom_id in todo:
+        completions.setdefault(custom_id, {"error": "missing from batch output"})
+    return completions
@@ -12,72 +12,377 @@ high-quality Jeopardy questions, evaluating:
 
 Usage:
     python scripts/benchmark_models.py
+    python scripts/benchmark_models.py --no-cache   # always call the API
 """
 
+from __future__ import annotations
+
 import os
+import sys
 import json
 import time
+import asyncio
+import bisect
+import re
+import hashlib
+import heapq
+import argparse
+import functools
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-from openai import OpenAI
-import requests
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+import _fastjson
+import batch_run
+import llm_cache
+from _clean import strip_fences
+from _http import close_async_clients, get_async_client, stream_chat
+from model_registry import ALL_MODELS, DEFAULT_MAX_TOKENS, ModelConfig
+
+# openai, httpx, requests and tenacity are imported where they are used, so
+# importing this module for its prompt and scoring helpers stays fast
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+try:
+    from json_repair import repair_json
+except ImportError:  # optional - the built-in bracket closer handles truncation
+    repair_json = None
 
 # Load environment variables
+# KEY=value lines (comments skipped, CRLF endings allowed) and ${VAR} references to earlier keys
+_ENV_LINE_RE = re.compile(r"^(?![ \t]*#)[ \t]*([A-Za-z_]\w*)[ \t]*=[ \t]*(.*?)[ \t\r]*$", re.M)
+_ENV_REF_RE = re.compile(r"\$\{(\w+)\}")
+
 def load_env():
     """Load .env file and return variables"""
     env_file = Path(__file__).parent.parent / ".env"
     env_vars = {}
 
     if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    # Handle ${VAR} references
-                    if '${' in line:
-                        var_name = line.split('${')[1].split('}')[0]
-                        line = line.replace(f'${{{var_name}}}', env_vars.get(var_name, ''))
-
-                    key, value = line.split('=', 1)
-                    env_vars[key.strip()] = value.strip()
+        for match in _ENV_LINE_RE.finditer(env_file.read_text()):
+            key, value = match.groups()
+            # Drop one pair of matching surrounding quotes
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+                value = value[1:-1]
+            env_vars[key] = _ENV_REF_RE.sub(lambda m: env_vars.get(m.group(1), ""), value)
 
     return env_vars
 
+_TRAILING_COMMA_RE = re.compile(r",\s*([\]}])")
+
+def _close_json(text: str) -> str:
+    """Close an unterminated string and any open arrays/objects, dropping trailing commas"""
+    closers = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            closers.append("}")
+        elif ch == "[":
+            closers.append("]")
+        elif ch in "}]" and closers:
+            closers.pop()
+
+    text = text + '"' if in_string else text.rstrip().rstrip(",")
+    return _TRAILING_COMMA_RE.sub(r"\1", text + "".join(reversed(closers)))
+
+def _repair_candidates(text: str) -> Iterator[str]:
+    """Yield progressively more aggressive repairs of a malformed JSON response"""
+    if repair_json:
+        yield repair_json(text)
+    yield _close_json(text)
+    # Cut back to the last complete object, e.g. when output stopped mid-key at max_tokens
+    last_close = text.rfind("}")
+    if last_close > 0:
+        yield _close_json(text[:last_close + 1])
+
+def parse_json_lenient(text: str) -> Tuple[Any, bool]:
+    """Parse JSON, salvaging truncated or sloppy output instead of discarding it
+
+    Returns (data, repaired). Raises json.JSONDecodeError when nothing usable
+    can be recovered.
+    """
+    try:
+        return _fastjson.loads(text), False
+    except json.JSONDecodeError as error:
+        for candidate in _repair_candidates(text):
+            try:
+                data = _fastjson.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if data and isinstance(data, (dict, list)):
+                return data, True
+        raise error
+
 # Load environment
 env = load_env()
 OPENROUTER_API_KEY = env.get('OPENROUTER_API_KEY', '')
 OPENAI_BASE_URL = env.get('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
 
-# Cache for model pricing
+def get_client() -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client - one keep-alive connection pool for every request
+
+    SDK retries are off; _retry.resilient_chat retries every stream_chat call.
+    """
+    return get_async_client(OPENROUTER_API_KEY, OPENAI_BASE_URL)
+
+# Providers that can be called directly instead of through OpenRouter: provider -> (base URL, .env key).
+# A route is only taken when its key is set in .env; otherwise the model goes through OpenRouter.
+PROVIDER_ROUTES = {
+    "z-ai": ("https://api.z.ai/api/paas/v4/", "ZAI_API_KEY"),
+}
+
+def client_for(model_config: ModelConfig) -> Tuple[AsyncOpenAI, str]:
+    """Return the shared client for a model's fastest configured endpoint, and the model id to send it"""
+    route = PROVIDER_ROUTES.get(model_config.provider)
+    if route and env.get(route[1]):
+        base_url, key_name = route
+        # Providers take their own ids: "z-ai/glm-4.7" is "glm-4.7" at Z.AI
+        return get_async_client(env[key_name], base_url), model_config.model.split("/", 1)[1]
+    return get_client(), model_config.model
+
+# Concurrency and request-rate limits for API calls (override in .env)
+BENCH_CONCURRENCY = int(env.get('BENCH_CONCURRENCY', '16'))
+BENCH_RPM = float(env.get('BENCH_RPM', '120'))
+
+# Ceilings measured from past runs (run_log.completion_token_ceilings), used with --auto-max-tokens
+TUNED_MAX_TOKENS: Dict[str, int] = {}
+
+def max_tokens_for(model_config: ModelConfig, categories: int = 1) -> int:
+    """max_tokens for a request covering some number of categories"""
+    per_category = TUNED_MAX_TOKENS.get(model_config.model) or model_config.max_tokens
+    return per_category * categories
+
+class TokenBucket:
+    """Async token bucket that spaces requests to a requests-per-minute budget"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity if capacity is not None else max(1.0, float(BENCH_CONCURRENCY))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, n: float = 1.0):
+        """Wait until n tokens are available, then take them"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+    def update_from_headers(self, headers: httpx.Headers):
+        """Drain the bucket when the server says we are close to its request limit"""
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None and remaining.isdigit():
+            self.tokens = min(self.tokens, float(remaining))
+
+_SEMAPHORE = asyncio.Semaphore(BENCH_CONCURRENCY)
+_RATE_LIMITER = TokenBucket(BENCH_RPM)
+
+# Request each clue value separately instead of all five in one response (--per-clue)
+PER_CLUE = False
+
+SYSTEM_PROMPT = "You are a Jeopardy game content generator. Always respond with valid JSON only, no prose. No markdown, no explanations, just raw JSON."
+
+# Fallback when a provider rejects a json_schema response_format: plain JSON mode,
+# then the prompt-only path
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# response_format types each model's provider has rejected, so later calls skip them
+_REJECTED_FORMATS: Dict[str, set] = {}
+
+# How providers word a 400 for an unsupported output mode
+_FORMAT_ERROR_RE = re.compile(r"response_format|json_schema|json_object|json mode|structured output", re.I)
+
+def _rejects_format(error: Exception) -> bool:
+    """Whether a 400 is about the response_format, rather than e.g. context length or an unknown model"""
+    return getattr(error, "param", None) == "response_format" or bool(_FORMAT_ERROR_RE.search(str(error)))
+
+async def _send(client: AsyncOpenAI, **request) -> Dict[str, Any]:
+    """Stream one request within the benchmark's concurrency and request-rate limits
+
+    Retries back off while still holding the semaphore (see _retry.resilient_chat);
+    the rate limiter is consulted again before every attempt.
+    """
+    async with _SEMAPHORE:
+        return await stream_chat(client, limiter=_RATE_LIMITER, **request)
+
+def build_messages(model: str, system: str, user: str) -> List[Dict[str, Any]]:
+    """Build the chat messages, marking the shared system prefix cacheable where that must be explicit"""
+    system_content = system
+    if model.startswith(_CACHE_CONTROL_PREFIXES):
+        system_content = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user}
+    ]
+
+def request_body(model: str, system: str, user: str, temperature: float = 0.7,
+                 max_tokens: int = DEFAULT_MAX_TOKENS, response_format: Optional[Dict] = None) -> Dict[str, Any]:
+    """Build the chat completion body for one request
+
+    Live and batch runs both send this body and key the response cache on it, so a
+    batch run reuses live results. Live runs skip batch results, which have no latencies.
+    """
+    return {
+        "model": model,
+        "messages": build_messages(model, system, user),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "response_format": response_format,
+    }
+
+async def request_completion(client: AsyncOpenAI, model: str, system: str, user: str,
+                             temperature: float = 0.7, max_tokens: int = DEFAULT_MAX_TOKENS,
+                             response_format: Optional[Dict] = None) -> Dict[str, Any]:
+    """Send one chat completion, serving repeats of an identical request from disk"""
+    from openai import BadRequestError
+
+    body = request_body(model, system, user, temperature, max_tokens, response_format)
+    cache_key = llm_cache.cache_key(body)
+
+    completion = llm_cache.load(cache_key)
+    if completion is not None:
+        completion["cached"] = True
+        completion["attempts"] = 0
+        return completion
+
+    # The requested format is part of the key; the one actually sent may step down below
+    request = {k: v for k, v in body.items() if k != "response_format"}
+    formats = [response_format, JSON_OBJECT_FORMAT] if response_format else []
+    rejected = _REJECTED_FORMATS.setdefault(model, set())
+    formats = [fmt for fmt in formats if fmt["type"] not in rejected] + [None]
+
+    for fmt in formats:
+        try:
+            if fmt:
+                completion = await _send(client, response_format=fmt, **request)
+            else:
+                completion = await _send(client, **request)
+            break
+        except BadRequestError as e:
+            if fmt is None or not _rejects_format(e):
+                raise
+            # Provider doesn't support this output mode - step down, the prompt still asks for JSON
+            rejected.add(fmt["type"])
+    completion["format"] = fmt["type"] if fmt else None
+
+    attempts = completion.pop("attempts")
+    llm_cache.store(cache_key, completion)
+
+    completion["cached"] = False
+    completion["attempts"] = attempts
+    return completion
+
+# Shared requests session for non-LLM OpenRouter endpoints (keep-alive + retries)
+_SESSION = None
+
+def get_session():
+    """Return the shared requests.Session, creating it on first use"""
+    global _SESSION
+
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        _SESSION = requests.Session()
+        _SESSION.headers["Authorization"] = f"Bearer {OPENROUTER_API_KEY}"
+        _SESSION.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+        ))
+
+    return _SESSION
+
+# Cache for model pricing, persisted to disk for a day between runs
 MODEL_PRICING: Dict[str, Dict[str, float]] = {}
+PRICING_CACHE_FILE = Path(__file__).parent.parent / ".cache" / "pricing.json"
+PRICING_CACHE_TTL = 24 * 60 * 60  # seconds
+
+# Background pricing fetch started by main, so the /models round trip overlaps the first API calls
+_PRICING_TASK: Optional[asyncio.Task] = None
+
+def start_pricing_fetch(refresh: bool = False):
+    """Start fetching model pricing in a worker thread without waiting for it"""
+    global _PRICING_TASK
+    _PRICING_TASK = asyncio.create_task(asyncio.to_thread(refresh_pricing if refresh else fetch_model_pricing))
+
+async def pricing_ready():
+    """Wait for the background pricing fetch, if one is running; a no-op once it has finished"""
+    if _PRICING_TASK is not None:
+        await _PRICING_TASK
 
 def fetch_model_pricing() -> Dict[str, Dict[str, float]]:
-    """Fetch model pricing from OpenRouter API"""
-    global MODEL_PRICING
+    """Fetch model pricing from OpenRouter API (or the on-disk copy if under a day old)
 
+    Only the first call in a process does any work; later calls return the loaded table.
+    """
     if MODEL_PRICING:
         return MODEL_PRICING
 
+    if PRICING_CACHE_FILE.exists() and time.time() - PRICING_CACHE_FILE.stat().st_mtime < PRICING_CACHE_TTL:
+        try:
+            cached = _fastjson.loads(PRICING_CACHE_FILE.read_bytes())
+        except (OSError, ValueError) as e:
+            # Unreadable or corrupt copy - fetch a fresh one, which also rewrites it
+            print(f"⚠️  Ignoring {PRICING_CACHE_FILE.name}: {e}")
+        else:
+            MODEL_PRICING.update(cached)
+            print(f"✓ Loaded pricing for {len(MODEL_PRICING)} models from {PRICING_CACHE_FILE.name}")
+            return MODEL_PRICING
+
+    return refresh_pricing()
+
+def refresh_pricing() -> Dict[str, Dict[str, float]]:
+    """Fetch model pricing from OpenRouter API, ignoring the loaded table and the on-disk copy
+
+    On failure the previously loaded prices, if any, are kept.
+    """
     try:
-        response = requests.get(
-            "https://openrouter.ai/api/v1/models",
-            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
-            timeout=10
-        )
+        response = get_session().get("https://openrouter.ai/api/v1/models", timeout=10)
         response.raise_for_status()
         data = response.json()
 
+        fetched = {}
         for model in data.get("data", []):
             model_id = model.get("id", "")
             pricing = model.get("pricing", {})
             if pricing:
-                MODEL_PRICING[model_id] = {
+                fetched[model_id] = {
                     "prompt": float(pricing.get("prompt", 0)),
                     "completion": float(pricing.get("completion", 0)),
                 }
 
+        # Swap the table only once the whole response has parsed
+        MODEL_PRICING.clear()
+        MODEL_PRICING.update(fetched)
         print(f"✓ Fetched pricing for {len(MODEL_PRICING)} models")
+
+        if MODEL_PRICING:
+            # Write a temp file and rename it over the cache, so readers never see a partial file
+            PRICING_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = PRICING_CACHE_FILE.with_suffix(".json.tmp")
+            tmp_file.write_bytes(_fastjson.dumps(MODEL_PRICING))
+            os.replace(tmp_file, PRICING_CACHE_FILE)
     except Exception as e:
         print(f"⚠️  Could not fetch pricing: {e}")
         print("    Continuing without cost tracking")
@@ -90,66 +395,25 @@ def calculate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> fl
     if not pricing:
         return 0.0
 
-    prompt_cost = (prompt_tokens / 1_000_000) * pricing.get("prompt", 0)
-    completion_cost = (completion_tokens / 1_000_000) * pricing.get("completion", 0)
+    # OpenRouter's /models endpoint quotes prices in USD per token
+    prompt_cost = prompt_tokens * pricing.get("prompt", 0)
+    completion_cost = completion_tokens * pricing.get("completion", 0)
 
     return prompt_cost + completion_cost
 
+# Display units by magnitude: below $0.001 in micro-dollars, below $0.01 in milli-dollars
+_COST_THRESHOLDS = (0.001, 0.01)
+_COST_UNITS = ((1_000_000, "${:.1f}μ"), (1000, "${:.2f}m"), (1, "${:.4f}"))
+
 def format_cost(cost: float) -> str:
     """Format cost for display"""
     if cost == 0:
         return "N/A"
-    elif cost < 0.001:
-        return f"${cost * 1_000_000:.1f}μ"
-    elif cost < 0.01:
-        return f"${cost * 1000:.2f}m"
-    else:
-        return f"${cost:.4f}"
+    scale, template = _COST_UNITS[bisect.bisect_right(_COST_THRESHOLDS, cost)]
+    return template.format(cost * scale)
 
-# Models to benchmark
-# Note: Check https://openrouter.ai/models for current model list and pricing
-MODELS = [
-    {
-        "id": "gemini-3-flash-preview",
-        "name": "Gemini 3 Flash Preview",
-        "model": "google/gemini-3-flash-preview"
-    },
-    {
-        "id": "gemini-2.5-flash-lite",
-        "name": "Gemini 2.5 Flash Lite",
-        "model": "google/gemini-2.5-flash-lite"
-    },
-    {
-        "id": "gemini-2.5-flash",
-        "name": "Gemini 2.5 Flash",
-        "model": "google/gemini-2.5-flash"
-    },
-    {
-        "id": "glm-4.7-flash",
-        "name": "GLM 4.7 Flash",
-        "model": "z-ai/glm-4.7-flash"
-    },
-    {
-        "id": "glm-4.7",
-        "name": "GLM 4.7",
-        "model": "z-ai/glm-4.7"
-    },
-    {
-        "id": "gpt-4o-mini",
-        "name": "GPT-4o Mini",
-        "model": "openai/gpt-4o-mini"
-    },
-    {
-        "id": "grok-4.1-fast",
-        "name": "Grok 4.1 Fast",
-        "model": "x-ai/grok-4.1-fast"
-    },
-    {
-        "id": "kimi-k2-thinking",
-        "name": "Kimi K2 Thinking",
-        "model": "moonshotai/kimi-k2-thinking"
-    },
-]
+# Models to benchmark: everything in the registry
+MODELS = list(ALL_MODELS.values())
 
 # Test prompts based on Jeop3's actual prompts
 TEST_CASES = [
@@ -188,70 +452,196 @@ of 98 degrees. Earth is the only planet known to support life.
     },
 ]
 
-def build_jeopardy_prompt(category: str, content_topic: str, theme: str,
-                          difficulty: str = "normal",
-                          reference_material: str = None) -> str:
-    """Build a Jeopardy prompt similar to Jeop3's actual prompts"""
-
-    difficulty_text = {
-        'easy': 'Make questions accessible and straightforward.',
-        'normal': 'Balanced difficulty level.',
-        'hard': 'Make questions challenging and specific.'
-    }.get(difficulty, 'Balanced difficulty level.')
-
-    value_guidance = {
-        200: "Obvious / very well-known facts",
-        400: "Common knowledge within topic",
-        600: "Requires familiarity with the topic",
-        800: "Niche or specific details",
-        1000: "Deep cuts / less obvious information"
-    }
+# Prompt pieces that never change between calls, built once at import
+CLUE_VALUES = [200, 400, 600, 800, 1000]
+
+DIFFICULTY_TEXT = {
+    'easy': 'Make questions accessible and straightforward.',
+    'normal': 'Balanced difficulty level.',
+    'hard': 'Make questions challenging and specific.'
+}
+
+VALUE_GUIDANCE = {
+    200: "Obvious / very well-known facts",
+    400: "Common knowledge within topic",
+    600: "Requires familiarity with the topic",
+    800: "Niche or specific details",
+    1000: "Deep cuts / less obvious information"
+}
+
+_GUIDANCE_TEXT = "\n".join([f"- ${v}: {VALUE_GUIDANCE[v]}" for v in CLUE_VALUES])
+
+# Prompts are split for provider-side prompt caching: everything that repeats across calls
+# (instructions, value guidance, reference material) goes first in the system message, and
+# only the short category-specific request varies in the user turn
+_CLUE_RULES = f"""Value guidelines:
+{_GUIDANCE_TEXT}
+
+REQUIREMENTS:
+- Clues must be in proper Jeopardy form (answers given as questions)
+- Clues should be clear, accurate, and engaging
+- Do NOT use the category name or any form of it in your clues"""
+
+# Only {category}, {content_topic}, {theme} and {difficulty_text} are filled per call
+_CLUES_TEMPLATE = """Generate 5 Jeopardy-style clues for the category: "{category}"
+
+Content Topic: "{content_topic}"
+Theme: {theme}
+
+{difficulty_text}
+
+Each clue must have a DIFFERENT unique answer.
+
+Return JSON: {{"clues": [{{"value": 200, "clue": "...", "response": "..."}}, ...]}} with one clue per value."""
+
+# Structured-output schema; replaces the full JSON example the prompt used to carry
+CLUES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "clues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "value": {"type": "integer", "enum": CLUE_VALUES},
+                    "clue": {"type": "string"},
+                    "response": {"type": "string"},
+                },
+                "required": ["value", "clue", "response"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["clues"],
+    "additionalProperties": False,
+}
+
+CLUES_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "jeopardy_clues", "strict": True, "schema": CLUES_SCHEMA},
+}
 
-    guidance_text = "\n".join([f"- ${v}: {value_guidance[v]}" for v in [200, 400, 600, 800, 1000]])
+_REF_MATERIAL_TEMPLATE = """
+
+Source material to use for questions:
+{reference_material}
 
+All clues must be answerable from the source material above."""
+
+@functools.lru_cache(maxsize=32)
+def build_system_prompt(reference_material: str = None) -> str:
+    """Build the shared, cacheable system message: instructions, rules and any source material"""
     ref_material_text = ""
     if reference_material:
-        ref_material_text = f"""
-Source material to use for questions:
-{reference_material[:3000]}
+        ref_material_text = _REF_MATERIAL_TEMPLATE.format(reference_material=reference_material[:3000])
+    return f"{SYSTEM_PROMPT}\n\n{_CLUE_RULES}{ref_material_text}"
 
-All clues must be answerable from the source material above.
-"""
+# Anthropic only caches prompt prefixes that are explicitly marked; OpenAI, Gemini and
+# the rest cache identical prefixes automatically
+_CACHE_CONTROL_PREFIXES = ("anthropic/",)
+
+@functools.lru_cache(maxsize=128)
+def build_jeopardy_prompt(category: str, content_topic: str, theme: str,
+                          difficulty: str = "normal",
+                          reference_material: str = None) -> Tuple[str, str]:
+    """Build a Jeopardy prompt similar to Jeop3's actual prompts, as (system, user) messages
+
+    Memoized: every model gets the identical prompt for a test case, so it is
+    built once per distinct (category, topic, theme, difficulty, source).
+    """
+    user = _CLUES_TEMPLATE.format(
+        category=category,
+        content_topic=content_topic,
+        theme=theme,
+        difficulty_text=DIFFICULTY_TEXT.get(difficulty, DIFFICULTY_TEXT['normal']),
+    )
+    return build_system_prompt(reference_material), user
+
+# Several categories in one request (quality_compare --batch-categories)
+_MULTI_CATEGORY_TEMPLATE = """Generate 5 Jeopardy-style clues for each of these {count} categories:
+
+{category_list}
 
-    return f"""Generate 5 Jeopardy-style clues for the category: "{category}"
+Within each category, every clue must have a DIFFERENT unique answer.
+
+Return JSON: {{"categories": [{{"name": "...", "clues": [{{"value": 200, "clue": "...", "response": "..."}}, ...]}}, ...]}} with the categories in the order given and one clue per value."""
+
+_MULTI_CATEGORY_ITEM = '{number}. "{category}" - Content Topic: "{content_topic}", Theme: {theme}. {difficulty_text}'
+
+def build_multi_category_prompt(categories: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """Build one (system, user) prompt asking for several categories at once
+
+    Each category is a dict with the build_jeopardy_prompt arguments (category,
+    content_topic, theme, difficulty, reference_material). The model answers with
+    a top-level "categories" array in the same order.
+    """
+    category_list = "\n".join(
+        _MULTI_CATEGORY_ITEM.format(
+            number=i,
+            category=c["category"],
+            content_topic=c["content_topic"],
+            theme=c["theme"],
+            difficulty_text=DIFFICULTY_TEXT.get(c.get("difficulty", "normal"), DIFFICULTY_TEXT['normal']),
+        )
+        for i, c in enumerate(categories, 1)
+    )
+    user = _MULTI_CATEGORY_TEMPLATE.format(count=len(categories), category_list=category_list)
+
+    references = "\n\n".join(c["reference_material"] for c in categories if c.get("reference_material"))
+    return build_system_prompt(references or None), user
+
+_SINGLE_CLUE_TEMPLATE = """Generate 1 Jeopardy-style clue worth ${value} for the category: "{category}"
 
 Content Topic: "{content_topic}"
 Theme: {theme}
 
 {difficulty_text}
 
-Value guidelines:
-{guidance_text}
-{ref_material_text}
-REQUIREMENTS:
-- Each clue must have a DIFFERENT unique answer
-- Clues must be in proper Jeopardy form (answers given as questions)
-- Clues should be clear, accurate, and engaging
-- Do NOT use the category name or any form of it in your clues
-
-Return JSON format:
-{{
-  "clues": [
-    {{"value": 200, "clue": "...", "response": "..."}},
-    {{"value": 400, "clue": "...", "response": "..."}},
-    {{"value": 600, "clue": "...", "response": "..."}},
-    {{"value": 800, "clue": "...", "response": "..."}},
-    {{"value": 1000, "clue": "...", "response": "..."}}
-  ]
-}}"""
+Difficulty for ${value}: {guidance}
+
+Return JSON: {{"clue": "...", "response": "..."}}"""
+
+SINGLE_CLUE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "jeopardy_clue",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "clue": {"type": "string"},
+                "response": {"type": "string"},
+            },
+            "required": ["clue", "response"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+@functools.lru_cache(maxsize=128)
+def build_single_clue_prompt(category: str, content_topic: str, theme: str, value: int,
+                             difficulty: str = "normal",
+                             reference_material: str = None) -> Tuple[str, str]:
+    """Build (system, user) messages for one clue at one value, for the --per-clue mode"""
+    user = _SINGLE_CLUE_TEMPLATE.format(
+        value=value,
+        category=category,
+        content_topic=content_topic,
+        theme=theme,
+        difficulty_text=DIFFICULTY_TEXT.get(difficulty, DIFFICULTY_TEXT['normal']),
+        guidance=VALUE_GUIDANCE[value],
+    )
+    return build_system_prompt(reference_material), user
 
 def evaluate_response(response_text: str, expected_values: List[int],
                       elapsed_time: float, model: str = "",
-                      prompt_tokens: int = 0, completion_tokens: int = 0) -> Dict[str, Any]:
+                      prompt_tokens: int = 0, completion_tokens: int = 0,
+                      ttft: Optional[float] = None) -> Dict[str, Any]:
     """Evaluate the AI response on multiple criteria"""
 
     result = {
         "valid_json": False,
+        "repaired": False,
         "parse_error": None,
         "all_values_present": False,
         "missing_values": [],
@@ -259,6 +649,7 @@ def evaluate_response(response_text: str, expected_values: List[int],
         "duplicate_answers": [],
         "clue_count": 0,
         "response_time_ms": round(elapsed_time * 1000, 2),
+        "ttft_ms": round(ttft * 1000, 2) if ttft is not None else None,
         "clues": [],
         "quality_score": 0,
         "token_usage": {
@@ -271,11 +662,15 @@ def evaluate_response(response_text: str, expected_values: List[int],
 
     # Try to parse JSON
     try:
-        data = json.loads(response_text)
-        result["valid_json"] = True
-
-        # Extract clues
-        clues = data.get("clues", [])
+        data, repaired = parse_json_lenient(response_text)
+        result["valid_json"] = not repaired
+        result["repaired"] = repaired
+
+        # Extract clues - a bare array or string parses, but isn't the requested shape
+        clues = data.get("clues", []) if isinstance(data, dict) else None
+        if not isinstance(clues, list) or not all(isinstance(c, dict) for c in clues):
+            result["parse_error"] = 'Response is not a {"clues": [...]} object'
+            return result
         result["clue_count"] = len(clues)
         result["clues"] = clues
 
@@ -284,24 +679,21 @@ def evaluate_response(response_text: str, expected_values: List[int],
             return result
 
         # Check all values present
-        present_values = [c.get("value") for c in clues if "value" in c]
+        present_values = {c.get("value") for c in clues}
         missing = [v for v in expected_values if v not in present_values]
         result["missing_values"] = missing
         result["all_values_present"] = len(missing) == 0
 
-        # Check unique answers
-        responses = [c.get("response", "").strip().lower() for c in clues if c.get("response")]
-        unique_responses = set(responses)
+        # Check unique answers (values are kept alongside, since clues without a response are skipped)
+        answered = [(c.get("value"), c["response"].strip().lower()) for c in clues if c.get("response")]
+        responses = [r for _, r in answered]
+        counts = Counter(responses)
 
-        # Find duplicates
-        seen = {}
-        duplicates = []
-        for i, r in enumerate(responses):
-            if r in seen:
-                duplicates.append(f"Value {clues[i].get('value')}: {r}")
-            seen[r] = seen.get(r, 0) + 1
+        # Every repeat after the first occurrence counts as a duplicate
+        duplicates = [f"Value {value}: {r}" for i, (value, r) in enumerate(answered)
+                      if counts[r] > 1 and responses.index(r) != i]
 
-        result["unique_answers"] = len(responses) == len(unique_responses)
+        result["unique_answers"] = all(count == 1 for count in counts.values())
         result["duplicate_answers"] = duplicates
 
         # Quality scoring (0-10)
@@ -314,16 +706,16 @@ def evaluate_response(response_text: str, expected_values: List[int],
         score -= len(duplicates) * 3
 
         # Penalty for missing fields
-        for clue in clues:
-            if not clue.get("clue"):
-                score -= 1
-            if not clue.get("response"):
-                score -= 1
+        score -= sum((not c.get("clue")) + (not c.get("response")) for c in clues)
 
         # Penalty for too few clues
         if len(clues) < 5:
             score -= (5 - len(clues)) * 1
 
+        # Penalty for output that only parsed after repair
+        if repaired:
+            score -= 1
+
         result["quality_score"] = max(0, min(10, score))
 
     except json.JSONDecodeError as e:
@@ -331,10 +723,57 @@ def evaluate_response(response_text: str, expected_values: List[int],
 
     return result
 
-def test_model(model_config: Dict, test_case: Dict, client: OpenAI) -> Dict[str, Any]:
-    """Test a single model on a single test case"""
+async def request_clues_separately(client: AsyncOpenAI, model_config: ModelConfig, test_case: Dict) -> Dict[str, Any]:
+    """Request each clue value concurrently in its own call, merged into one completion
+
+    Each call decodes ~130 tokens instead of ~650, so the category arrives in
+    roughly the time of its slowest single clue. Answer uniqueness can no longer
+    be enforced by the model and is only checked when scoring.
+    """
+    # Reasoning models think as long for one clue as for five, so each call keeps the model's full ceiling
+    max_tokens = max_tokens_for(model_config)
+    completions = await asyncio.gather(*(
+        request_completion(
+            client, model_config.model,
+            *build_single_clue_prompt(
+                category=test_case["category"],
+                content_topic=test_case["content_topic"],
+                theme=test_case["theme"],
+                value=value,
+                difficulty=test_case["difficulty"],
+                reference_material=test_case["reference_material"]
+            ),
+            max_tokens=max_tokens,
+            response_format=SINGLE_CLUE_RESPONSE_FORMAT,
+        )
+        for value in CLUE_VALUES
+    ))
+
+    clues = []
+    for value, completion in zip(CLUE_VALUES, completions):
+        try:
+            data, _ = parse_json_lenient(strip_fences(completion["content"]))
+        except json.JSONDecodeError:
+            continue  # scored as a missing value
+        if isinstance(data, dict):
+            clues.append({"value": value, "clue": data.get("clue", ""), "response": data.get("response", "")})
+
+    ttfts = [c["ttft"] for c in completions if c.get("ttft") is not None]
+    return {
+        "content": _fastjson.dumps({"clues": clues}).decode(),
+        "format": "json_object",  # re-serialised above, so never fenced
+        "prompt_tokens": sum(c["prompt_tokens"] for c in completions),
+        "completion_tokens": sum(c["completion_tokens"] for c in completions),
+        "ttft": min(ttfts) if ttfts else None,
+        # The calls run side by side, so the category takes as long as its slowest clue
+        "elapsed": max(c["elapsed"] for c in completions),
+        "cached": all(c["cached"] for c in completions),
+        "attempts": sum(c["attempts"] for c in completions),
+    }
 
-    prompt = build_jeopardy_prompt(
+def test_case_prompt(test_case: Dict) -> Tuple[str, str]:
+    """Build the full-category prompt for a test case"""
+    return build_jeopardy_prompt(
         category=test_case["category"],
         content_topic=test_case["content_topic"],
         theme=test_case["theme"],
@@ -342,204 +781,430 @@ def test_model(model_config: Dict, test_case: Dict, client: OpenAI) -> Dict[str,
         reference_material=test_case["reference_material"]
     )
 
-    start_time = time.time()
+async def test_model(model_config: ModelConfig, test_case: Dict, prompt: Tuple[str, str], client: AsyncOpenAI) -> Dict[str, Any]:
+    """Test a single model on a single test case, given the test case's prebuilt prompt"""
+
+    start_time = time.perf_counter_ns()
 
     try:
-        response = client.chat.completions.create(
-            model=model_config["model"],
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a Jeopardy game content generator. Always respond with valid JSON only, no prose. No markdown, no explanations, just raw JSON."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-        )
+        if PER_CLUE:
+            completion = await request_clues_separately(client, model_config, test_case)
+        else:
+            completion = await request_completion(
+                client, model_config.model, *prompt,
+                max_tokens=max_tokens_for(model_config),
+                response_format=CLUES_RESPONSE_FORMAT,
+            )
+        # Costs are computed while scoring, so pricing has to have arrived by now
+        await pricing_ready()
+        return score_completion(model_config, completion)
 
-        elapsed = time.time() - start_time
-        response_text = response.choices[0].message.content or ""
-
-        # Extract token usage
-        usage = response.usage
-        prompt_tokens = usage.prompt_tokens if usage else 0
-        completion_tokens = usage.completion_tokens if usage else 0
-
-        # Clean response (remove markdown code blocks if present)
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            if len(lines) > 1 and lines[0].startswith("```"):
-                response_text = "\n".join(lines[1:])
-            if response_text.endswith("```"):
-                response_text = response_text[:-3].strip()
-
-        evaluation = evaluate_response(
-            response_text,
-            [200, 400, 600, 800, 1000],
-            elapsed,
-            model=model_config["model"],
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens
-        )
+    except Exception as e:
+        return failed_result(e, (time.perf_counter_ns() - start_time) / 1e9)
+
+def score_completion(model_config: ModelConfig, completion: Dict[str, Any]) -> Dict[str, Any]:
+    """Evaluate a finished completion into a test result"""
+
+    # A cache hit reports the latency recorded when the response was first fetched
+    elapsed = completion["elapsed"]
+    # Some providers fence their output even in a JSON mode
+    response_text = strip_fences(completion["content"])
+    prompt_tokens = completion["prompt_tokens"]
+    completion_tokens = completion["completion_tokens"]
+
+    evaluation = evaluate_response(
+        response_text,
+        CLUE_VALUES,
+        elapsed,
+        model=model_config.model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        ttft=completion.get("ttft"),
+    )
 
-        return {
-            "success": True,
-            "response_text": response_text,
-            "evaluation": evaluation,
-            "error": None,
-        }
+    return {
+        "success": True,
+        "cached": completion["cached"],
+        "attempts": completion["attempts"],
+        "response_text": response_text,
+        "evaluation": evaluation,
+        "error": None,
+    }
 
-    except Exception as e:
-        elapsed = time.time() - start_time
-        return {
-            "success": False,
-            "response_text": None,
-            "evaluation": {
-                "valid_json": False,
-                "parse_error": str(e),
-                "response_time_ms": round(elapsed * 1000, 2),
-                "quality_score": 0,
-                "token_usage": {
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0,
-                },
-                "cost_usd": 0.0,
+def failed_result(error: BaseException, elapsed: float = 0.0) -> Dict[str, Any]:
+    """Build the result record for a test that raised instead of returning"""
+    return {
+        "success": False,
+        "attempts": getattr(error, "attempts", 1),
+        "response_text": None,
+        "evaluation": {
+            "valid_json": False,
+            "parse_error": str(error),
+            "all_values_present": False,
+            "missing_values": [],
+            "unique_answers": False,
+            "duplicate_answers": [],
+            "clue_count": 0,
+            "response_time_ms": round(elapsed * 1000, 2),
+            "ttft_ms": None,
+            "clues": [],
+            "quality_score": 0,
+            "token_usage": {
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
             },
-            "error": str(e),
-        }
+            "cost_usd": 0.0,
+        },
+        "error": str(error),
+    }
 
-def print_results(results: Dict):
-    """Print benchmark results in a nice format"""
+# Checkpoint file - one JSON line per finished test, so an interrupted run can resume
+_CHECKPOINT = None
+_COMPLETED: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+def prompt_hash(prompt: Tuple[str, str]) -> str:
+    """Hash the prompt a test case sends, to recognise it in a checkpoint"""
+    return _hash_prompt(prompt, "per-clue" if PER_CLUE else "")
+
+@functools.lru_cache(maxsize=128)
+def _hash_prompt(prompt: Tuple[str, str], mode: str = "") -> str:
+    system, user = prompt
+    return hashlib.sha256(f"{system}|{mode}|{user}".encode()).hexdigest()
+
+def clean_result(test_result: Dict) -> Dict[str, Any]:
+    """Reduce a test result to what gets saved to disk"""
+    return {
+        "success": test_result["success"],
+        "attempts": test_result["attempts"],
+        "evaluation": test_result["evaluation"],
+        "error": test_result["error"],
+        "response_text": test_result["response_text"][:500] if test_result["response_text"] else None,  # Truncate for file
+    }
 
-    print("\n" + "=" * 100)
-    print("JEOPARDY AI MODEL BENCHMARK RESULTS")
-    print("=" * 100)
+def load_checkpoint(path: Path) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Read a checkpoint file, keeping the latest record per (model, prompt hash)
+
+    A line that doesn't parse - the tail of a write cut short by a kill - is skipped,
+    so that test simply runs again.
+    """
+    records = {}
+    if path.exists():
+        with open(path) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = _fastjson.loads(line)
+                except ValueError:
+                    print(f"⚠️  Skipping unreadable line {line_number} of {path.name}")
+                    continue
+                records[(record["model"], record["prompt_hash"])] = record
+    return records
+
+def open_checkpoint(path: Path):
+    """Open a checkpoint file for appending, first dropping a last line whose write was cut short"""
+    if path.exists():
+        data = path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            with open(path, "r+b") as f:
+                f.truncate(data.rfind(b"\n") + 1)
+    return open(path, "a", buffering=1)
+
+def save_checkpoint(model: ModelConfig, test_case: Dict, prompt: Tuple[str, str], test_result: Dict):
+    """Append one finished test to the checkpoint file and flush it to disk"""
+    record = {
+        "model_id": model.id,
+        "name": model.name,
+        "model": model.model,
+        "test_case": test_case["name"],
+        "prompt_hash": prompt_hash(prompt),
+        "result": clean_result(test_result),
+    }
+    _CHECKPOINT.write(_fastjson.dumps(record).decode() + "\n")
+    _CHECKPOINT.flush()
 
-    # Summary table
-    print("\n📊 SUMMARY TABLE")
-    print("-" * 110)
-    print(f"{'Model':<28} {'Valid':<8} {'Values':<8} {'Unique':<8} {'Time':<10} {'Quality':<10} {'Cost/Gen':<12} {'Total Cost':<12}")
-    print("-" * 110)
+def compose_results(path: Path, prompts: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Build the classic indented results document from a checkpoint file"""
+    records = load_checkpoint(path)
+    hashes = [prompt_hash(prompt) for prompt in prompts]
 
+    results = {}
+    for model in MODELS:
+        model_records = [records.get((model.model, h)) for h in hashes]
+        saved = [r["result"] for r in model_records if r]
+        if not saved:
+            continue
+        results[model.id] = {
+            "name": model.name,
+            "model": model.model,
+            "total_cost_usd": sum(r["evaluation"]["cost_usd"] for r in saved),
+            "results": saved,
+        }
+    return results
+
+async def run_test_case(model: ModelConfig, test_case: Dict, prompt: Tuple[str, str], client: AsyncOpenAI) -> Dict[str, Any]:
+    """Run one test case and report progress as soon as it finishes"""
+    done = _COMPLETED.get((model.model, prompt_hash(prompt)))
+    if done:
+        print(f"   → {model.name}: {test_case['name']} (from checkpoint)")
+        return done["result"]
+
+    test_result = await test_model(model, test_case, prompt, client)
+    if _CHECKPOINT:
+        save_checkpoint(model, test_case, prompt, test_result)
+    cached = " (cached)" if test_result.get("cached") else ""
+    print(f"   → {model.name}: {test_case['name']}{cached}")
+    # The full response text is already on disk; only keep the trimmed record in memory
+    return clean_result(test_result)
+
+# Batch mode (--batch): all tests go out as one Batch API job (see batch_run)
+def batch_request_body(model: ModelConfig, prompt: Tuple[str, str]) -> Dict[str, Any]:
+    """Build the chat completion body a batch job sends for one test"""
+    return request_body(model.model, *prompt, max_tokens=max_tokens_for(model),
+                        response_format=CLUES_RESPONSE_FORMAT)
+
+async def run_batch_tests(client: AsyncOpenAI, pairs: List[Tuple[ModelConfig, Dict, Tuple[str, str]]],
+                          input_path: Path) -> List[Dict[str, Any]]:
+    """Run every test as one batch job and score the results, in the order of pairs"""
+    requests = {
+        f"{model.id}::{i}": batch_request_body(model, prompt)
+        for i, (model, _, prompt) in enumerate(pairs)
+    }
+    completions = await batch_run.run_batch(client, requests, input_path)
+
+    await pricing_ready()
+    results = []
+    for custom_id, (model, test_case, prompt) in zip(requests, pairs):
+        completion = completions[custom_id]
+        if "error" in completion:
+            result = failed_result(RuntimeError(completion["error"]))
+        else:
+            result = score_completion(model, {
+                **completion,
+                "format": CLUES_RESPONSE_FORMAT["type"],
+                "attempts": 0 if completion["cached"] else 1,
+            })
+        if _CHECKPOINT:
+            save_checkpoint(model, test_case, prompt, result)
+        cached = " (cached)" if completion.get("cached") else ""
+        print(f"   → {model.name}: {test_case['name']}{cached}")
+        results.append(clean_result(result))
+    return results
+
+def summarize_results(results: Dict) -> List[Dict[str, Any]]:
+    """Compute one summary row of aggregate metrics per model (no I/O)"""
+    rows = []
     for model_id, model_results in results.items():
-        valid_count = sum(1 for r in model_results["results"] if r["evaluation"]["valid_json"])
-        all_values_count = sum(1 for r in model_results["results"] if r["evaluation"]["all_values_present"])
-        unique_count = sum(1 for r in model_results["results"] if r["evaluation"]["unique_answers"])
-        avg_time = sum(r["evaluation"]["response_time_ms"] for r in model_results["results"]) / len(model_results["results"])
-        avg_quality = sum(r["evaluation"]["quality_score"] for r in model_results["results"]) / len(model_results["results"])
-        total_cost = sum(r["evaluation"]["cost_usd"] for r in model_results["results"])
-        avg_cost = total_cost / len(model_results["results"])
-
-        print(f"{model_results['name']:<28} {valid_count}/{len(model_results['results']):<7} "
-              f"{all_values_count}/{len(model_results['results']):<7} "
-              f"{unique_count}/{len(model_results['results']):<7} "
-              f"{avg_time:>7.0f}ms  {avg_quality:>6.1f}/10  "
-              f"{format_cost(avg_cost):<12} {format_cost(total_cost):<12}")
-
-    print("-" * 110)
+        n = len(model_results["results"])
+        valid = all_values = unique = 0
+        total_time = total_quality = total_cost = 0
+        ttft_sum, ttft_count = 0, 0
+
+        # One pass over the results instead of a sum() per metric
+        for r in model_results["results"]:
+            ev = r["evaluation"]
+            valid += ev["valid_json"]
+            all_values += ev["all_values_present"]
+            unique += ev["unique_answers"]
+            total_time += ev["response_time_ms"]
+            total_quality += ev["quality_score"]
+            total_cost += ev["cost_usd"]
+            ttft = ev.get("ttft_ms")
+            if ttft is not None:
+                ttft_sum += ttft
+                ttft_count += 1
+
+        rows.append({
+            "id": model_id,
+            "name": model_results["name"],
+            "tests": n,
+            "valid": valid,
+            "all_values": all_values,
+            "unique": unique,
+            "avg_ttft": ttft_sum / ttft_count if ttft_count else None,
+            "avg_time": total_time / n,
+            "avg_quality": total_quality / n,
+            "success_rate": valid / n,
+            "total_cost": total_cost,
+            "avg_cost": total_cost / n,
+        })
+    return rows
+
+def render_summary(rows: List[Dict[str, Any]], fmt: str) -> str:
+    """Render summary rows as markdown, csv or json"""
+    if fmt == "json":
+        return _fastjson.dumps(rows, indent=True).decode()
+
+    columns = ["name", "valid", "all_values", "unique", "avg_ttft", "avg_time", "avg_quality", "total_cost", "avg_cost"]
+    if fmt == "csv":
+        import csv
+        import io
+
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=["id"] + columns + ["tests", "success_rate"], lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        return buf.getvalue().rstrip("\n")
+
+    # markdown
+    lines = [
+        "| Model | Valid | Values | Unique | TTFT | Time | Quality | Cost/Gen | Total Cost |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        ttft = f"{row['avg_ttft']:.0f}ms" if row["avg_ttft"] is not None else "N/A"
+        lines.append(f"| {row['name']} | {row['valid']}/{row['tests']} | {row['all_values']}/{row['tests']} "
+                     f"| {row['unique']}/{row['tests']} | {ttft} | {row['avg_time']:.0f}ms "
+                     f"| {row['avg_quality']:.1f}/10 | {format_cost(row['avg_cost'])} | {format_cost(row['total_cost'])} |")
+    return "\n".join(lines)
+
+def value_score(row: Dict[str, Any]) -> float:
+    """Quality per dollar for a summary row"""
+    if row["total_cost"] > 0:
+        return row["avg_quality"] / row["total_cost"]
+    return row["avg_quality"] * 1000  # Free models get bonus
+
+def _trunc(text: str, limit: int) -> str:
+    """Shorten text to limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def render_report(results: Dict, rows: List[Dict[str, Any]]) -> str:
+    """Render the full human-readable report as one string"""
+    out = []
+
+    out.append("\n" + "=" * 100)
+    out.append("JEOPARDY AI MODEL BENCHMARK RESULTS")
+    out.append("=" * 100)
+
+    # Summary table
+    out.append("\n📊 SUMMARY TABLE")
+    out.append("-" * 120)
+    out.append(f"{'Model':<28} {'Valid':<8} {'Values':<8} {'Unique':<8} {'TTFT':<10} {'Time':<10} {'Quality':<10} {'Cost/Gen':<12} {'Total Cost':<12}")
+    out.append("-" * 120)
+
+    for row in rows:
+        avg_ttft = f"{row['avg_ttft']:>7.0f}ms" if row["avg_ttft"] is not None else f"{'N/A':>9}"
+        out.append(f"{row['name']:<28} {row['valid']}/{row['tests']:<7} "
+                   f"{row['all_values']}/{row['tests']:<7} "
+                   f"{row['unique']}/{row['tests']:<7} "
+                   f"{avg_ttft}  {row['avg_time']:>7.0f}ms  {row['avg_quality']:>6.1f}/10  "
+                   f"{format_cost(row['avg_cost']):<12} {format_cost(row['total_cost']):<12}")
+
+    out.append("-" * 120)
+    grand_total = sum(row["total_cost"] for row in rows)
+    out.append(f"{'Total spend:':<28} {format_cost(grand_total)}")
 
     # Detailed results per model
     for model_id, model_results in results.items():
-        print(f"\n{'=' * 100}")
-        print(f"🤖 {model_results['name']} ({model_id})")
-        print(f"{'=' * 100}")
+        out.append(f"\n{'=' * 100}")
+        out.append(f"🤖 {model_results['name']} ({model_id})")
+        out.append(f"{'=' * 100}")
 
         for i, test_result in enumerate(model_results["results"]):
             test_case = TEST_CASES[i]
             eval_result = test_result["evaluation"]
 
-            print(f"\n📝 Test: {test_case['name']}")
-            print(f"   Category: {test_case['category']}")
+            out.append(f"\n📝 Test: {test_case['name']}")
+            out.append(f"   Category: {test_case['category']}")
 
             if not test_result["success"]:
-                print(f"   ❌ ERROR: {test_result['error']}")
+                out.append(f"   ❌ ERROR: {test_result['error']} (after {test_result['attempts']} attempt(s))")
                 continue
 
             status = "✅" if eval_result["valid_json"] else "❌"
-            print(f"   {status} JSON Valid: {eval_result['valid_json']}")
+            out.append(f"   {status} JSON Valid: {eval_result['valid_json']}")
 
             if eval_result["parse_error"]:
-                print(f"   ⚠️  Parse Error: {eval_result['parse_error']}")
+                out.append(f"   ⚠️  Parse Error: {eval_result['parse_error']}")
+            if eval_result.get("repaired"):
+                out.append("   🩹 Malformed JSON was repaired before scoring (-1 quality)")
 
-            print(f"   {'✅' if eval_result['all_values_present'] else '❌'} All Values Present: {eval_result['all_values_present']}")
+            out.append(f"   {'✅' if eval_result['all_values_present'] else '❌'} All Values Present: {eval_result['all_values_present']}")
             if eval_result["missing_values"]:
-                print(f"      Missing: {eval_result['missing_values']}")
+                out.append(f"      Missing: {eval_result['missing_values']}")
 
-            print(f"   {'✅' if eval_result['unique_answers'] else '❌'} Unique Answers: {eval_result['unique_answers']}")
+            out.append(f"   {'✅' if eval_result['unique_answers'] else '❌'} Unique Answers: {eval_result['unique_answers']}")
             if eval_result["duplicate_answers"]:
-                print(f"      Duplicates: {eval_result['duplicate_answers']}")
+                out.append(f"      Duplicates: {eval_result['duplicate_answers']}")
 
-            print(f"   ⏱️  Response Time: {eval_result['response_time_ms']}ms")
-            print(f"   ⭐ Quality Score: {eval_result['quality_score']}/10")
-            print(f"   💰 Cost: {format_cost(eval_result['cost_usd'])} "
-                  f"({eval_result['token_usage']['total_tokens']} tokens)")
+            ttft_ms = eval_result.get("ttft_ms")
+            out.append(f"   ⏱️  Response Time: {eval_result['response_time_ms']}ms"
+                       f" (first token: {f'{ttft_ms}ms' if ttft_ms is not None else 'N/A'})")
+            out.append(f"   ⭐ Quality Score: {eval_result['quality_score']}/10")
+            out.append(f"   💰 Cost: {format_cost(eval_result['cost_usd'])} "
+                       f"({eval_result['token_usage']['total_tokens']} tokens)")
 
             if eval_result["clues"]:
-                print(f"\n   Generated Clues:")
+                out.append(f"\n   Generated Clues:")
                 for clue in eval_result["clues"]:
-                    value = clue.get("value", "?")
-                    clue_text = clue.get("clue", "")[:60] + "..." if len(clue.get("clue", "")) > 60 else clue.get("clue", "")
-                    response = clue.get("response", "")[:40] + "..." if len(clue.get("response", "")) > 40 else clue.get("response", "")
-                    print(f"      ${value}: {clue_text}")
-                    print(f"         → {response}")
+                    out.append(f"      ${clue.get('value', '?')}: {_trunc(clue.get('clue', ''), 60)}")
+                    out.append(f"         → {_trunc(clue.get('response', ''), 40)}")
 
     # Recommendations
-    print(f"\n{'=' * 100}")
-    print("💡 RECOMMENDATIONS")
-    print(f"{'=' * 100}")
-
-    # Calculate overall scores
-    model_scores = []
-    for model_id, model_results in results.items():
-        avg_quality = sum(r["evaluation"]["quality_score"] for r in model_results["results"]) / len(model_results["results"])
-        success_rate = sum(1 for r in model_results["results"] if r["evaluation"]["valid_json"]) / len(model_results["results"])
-        avg_time = sum(r["evaluation"]["response_time_ms"] for r in model_results["results"]) / len(model_results["results"])
-        total_cost = sum(r["evaluation"]["cost_usd"] for r in model_results["results"])
-
-        model_scores.append({
-            "id": model_id,
-            "name": model_results["name"],
-            "avg_quality": avg_quality,
-            "success_rate": success_rate,
-            "avg_time": avg_time,
-            "total_cost": total_cost,
-        })
+    out.append(f"\n{'=' * 100}")
+    out.append("💡 RECOMMENDATIONS")
+    out.append(f"{'=' * 100}")
 
     # Sort by quality score
-    model_scores.sort(key=lambda x: x["avg_quality"], reverse=True)
+    model_scores = sorted(rows, key=lambda x: x["avg_quality"], reverse=True)
 
-    print("\n🏆 Ranked by Quality Score:")
+    out.append("\n🏆 Ranked by Quality Score:")
     for i, model in enumerate(model_scores, 1):
-        print(f"   {i}. {model['name']}: {model['avg_quality']:.1f}/10 "
-              f"({model['success_rate']*100:.0f}% success, {model['avg_time']:.0f}ms avg, {format_cost(model['total_cost'])} total)")
-
-    print("\n⚡ Fastest Models:")
-    model_scores_sorted_speed = sorted(model_scores, key=lambda x: x["avg_time"])
-    for i, model in enumerate(model_scores_sorted_speed[:3], 1):
-        print(f"   {i}. {model['name']}: {model['avg_time']:.0f}ms avg ({format_cost(model['total_cost'])})")
-
-    print("\n💸 Most Cost-Effective (Quality per dollar):")
-    # Calculate value score (quality / cost * 1000 for better numbers)
-    for model in model_scores:
-        if model['total_cost'] > 0:
-            model['value_score'] = (model['avg_quality'] / model['total_cost']) if model['total_cost'] > 0 else 0
-        else:
-            model['value_score'] = model['avg_quality'] * 1000  # Free models get bonus
+        out.append(f"   {i}. {model['name']}: {model['avg_quality']:.1f}/10 "
+                   f"({model['success_rate']*100:.0f}% success, {model['avg_time']:.0f}ms avg, {format_cost(model['total_cost'])} total)")
+
+    # Only the top three are shown, so select them without sorting every model again
+    out.append("\n⚡ Fastest Models:")
+    for i, model in enumerate(heapq.nsmallest(3, model_scores, key=lambda x: x["avg_time"]), 1):
+        out.append(f"   {i}. {model['name']}: {model['avg_time']:.0f}ms avg ({format_cost(model['total_cost'])})")
 
-    model_scores_sorted_value = sorted(model_scores, key=lambda x: x['value_score'], reverse=True)
-    for i, model in enumerate(model_scores_sorted_value[:3], 1):
+    out.append("\n💸 Most Cost-Effective (Quality per dollar):")
+    for i, model in enumerate(heapq.nlargest(3, model_scores, key=value_score), 1):
         cost_str = "FREE" if model['total_cost'] == 0 else format_cost(model['total_cost'])
-        print(f"   {i}. {model['name']}: {model['avg_quality']:.1f}/10 for {cost_str}")
+        out.append(f"   {i}. {model['name']}: {model['avg_quality']:.1f}/10 for {cost_str}")
 
-    print("\n" + "=" * 100)
+    out.append("\n" + "=" * 100)
+    return "\n".join(out)
 
-def main():
+def print_results(results: Dict, fmt: str = "text"):
+    """Print benchmark results in a nice format, as a single write to stdout"""
+    rows = summarize_results(results)
+    if fmt == "text":
+        report = render_report(results, rows)
+    else:
+        report = render_summary(rows, fmt)
+    sys.stdout.write(report + "\n")
+    sys.stdout.flush()
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Benchmark AI models on Jeopardy clue generation")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore cached responses and call the API for every test")
+    parser.add_argument("--per-clue", action="store_true",
+                        help="request each clue value in its own concurrent call instead of all five at once")
+    parser.add_argument("--format", choices=["text", "markdown", "csv", "json"], default="text",
+                        help="report format: full text report (default) or a summary table as markdown/csv/json")
+    parser.add_argument("--resume", type=Path, metavar="CHECKPOINT",
+                        help="continue an interrupted run from its benchmark_results_*.jsonl file")
+    parser.add_argument("--batch", action="store_true",
+                        help="submit all tests as one Batch API job and wait for it (cheaper, can take hours; "
+                             "needs an endpoint with /v1/batches)")
+    parser.add_argument("--refresh-pricing", action="store_true",
+                        help="re-download model pricing even if the cached copy is under a day old")
+    return parser.parse_args()
+
+async def main():
     """Main benchmark function"""
+    global PER_CLUE, _CHECKPOINT, _COMPLETED
+
+    args = parse_args()
+    llm_cache.ENABLED = not args.no_cache
+    PER_CLUE = args.per_clue
+    if args.batch and PER_CLUE:
+        print("❌ Error: --batch and --per-clue can't be combined")
+        return
 
     if not OPENROUTER_API_KEY:
         print("❌ Error: OPENROUTER_API_KEY not found in .env file")
@@ -549,59 +1214,68 @@ def main():
     print(f"Testing {len(MODELS)} models on {len(TEST_CASES)} test cases")
     print(f"API Base: {OPENAI_BASE_URL}")
 
-    # Fetch model pricing
+    # Pricing is only needed once the first response is scored, so fetch it alongside the tests
     print("\n📊 Fetching model pricing...")
-    fetch_model_pricing()
+    start_pricing_fetch(refresh=args.refresh_pricing)
+
+    # Every finished test is appended to the checkpoint as it completes
+    if args.resume:
+        checkpoint_file = args.resume
+        # Only successful tests are skipped; failures get another try
+        _COMPLETED = {key: r for key, r in load_checkpoint(checkpoint_file).items() if r["result"]["success"]}
+        print(f"\n♻️  Resuming from {checkpoint_file} ({len(_COMPLETED)} tests already done)")
+    else:
+        from datetime import datetime
 
-    client = OpenAI(
-        api_key=OPENROUTER_API_KEY,
-        base_url=OPENAI_BASE_URL,
-    )
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        checkpoint_file = Path(__file__).parent.parent / f"benchmark_results_{timestamp}.jsonl"
+    _CHECKPOINT = open_checkpoint(checkpoint_file)
 
-    results = {}
+    client = get_client()
 
-    for model in MODELS:
-        print(f"\n🧪 Testing {model['name']}...")
-        model_results = {
-            "name": model["name"],
-            "model": model["model"],
-            "results": []
-        }
+    # Prompts depend only on the test case, so build each one once rather than per model
+    prompts = [test_case_prompt(test_case) for test_case in TEST_CASES]
 
-        for test_case in TEST_CASES:
-            print(f"   → {test_case['name']}")
-            test_result = test_model(model, test_case, client)
-            model_results["results"].append(test_result)
+    pairs = [(model, test_case, prompt) for model in MODELS for test_case, prompt in zip(TEST_CASES, prompts)]
+    if args.batch:
+        done = [_COMPLETED.get((model.model, prompt_hash(prompt))) for model, _, prompt in pairs]
+        todo = [pair for pair, record in zip(pairs, done) if not record]
+        print(f"\n🧪 Running {len(todo)} tests as one batch job...")
+        batched = iter(await run_batch_tests(client, todo, checkpoint_file.with_suffix(".batch_input.jsonl")) if todo else [])
+        outcomes = [record["result"] if record else next(batched) for record in done]
+    else:
+        # Every (model, test case) pair runs concurrently, bounded by the request limiter,
+        # so total time is roughly the slowest call rather than the sum of all of them
+        print(f"\n🧪 Running {len(pairs)} tests concurrently (max {BENCH_CONCURRENCY} in flight)...")
+        outcomes = await asyncio.gather(
+            *(run_test_case(model, test_case, prompt, client) for model, test_case, prompt in pairs),
+            return_exceptions=True,
+        )
 
-        results[model["id"]] = model_results
+    # gather() keeps submission order, so each model's results are a contiguous slice
+    results = {}
+    per_model = len(TEST_CASES)
+    for i, model in enumerate(MODELS):
+        model_outcomes = outcomes[i * per_model:(i + 1) * per_model]
+        results[model.id] = {
+            "name": model.name,
+            "model": model.model,
+            "results": [failed_result(o) if isinstance(o, BaseException) else o for o in model_outcomes],
+        }
+
+    await pricing_ready()
+    await close_async_clients()
+    _CHECKPOINT.close()
 
     # Print results
-    print_results(results)
-
-    # Save results to file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_file = Path(__file__).parent.parent / f"benchmark_results_{timestamp}.json"
-
-    # Clean results for JSON serialization
-    clean_results = {}
-    for model_id, model_data in results.items():
-        clean_results[model_id] = {
-            "name": model_data["name"],
-            "model": model_data["model"],
-            "results": []
-        }
-        for r in model_data["results"]:
-            clean_results[model_id]["results"].append({
-                "success": r["success"],
-                "evaluation": r["evaluation"],
-                "error": r["error"],
-                "response_text": r["response_text"][:500] if r["response_text"] else None,  # Truncate for file
-            })
+    print_results(results, args.format)
 
-    with open(results_file, "w") as f:
-        json.dump(clean_results, f, indent=2)
+    # Save the full results document alongside the checkpoint
+    results_file = checkpoint_file.with_suffix(".json")
+    results_file.write_bytes(_fastjson.dumps(compose_results(checkpoint_file, prompts), indent=True))
 
     print(f"\n💾 Results saved to: {results_file}")
+    print(f"   Checkpoint: {checkpoint_file}")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
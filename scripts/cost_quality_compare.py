@@ -9,11 +9,11 @@ Shows realistic times and costs for generating a full Jeop3 game
 # Gemini 2.5 Flash: ~2.2s per category, 663 tokens avg
 # Gemini 3 Flash Preview: ~3.1s per category, 683 tokens avg
 
-# Pricing from OpenRouter (per million tokens)
+# Pricing from OpenRouter: (input, output) dollars per million tokens
 PRICING = {
-    "gemini-2.5-flash-lite": 0.075,   # $0.075 per million input / $0.30 per million output
-    "gemini-2.5-flash": 0.075,        # $0.075 per million input / $0.30 per million output
-    "gemini-3-flash-preview": 0.075,  # Approximate - same tier
+    "gemini-2.5-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.075, 0.30),
+    "gemini-3-flash-preview": (0.075, 0.30),  # Approximate - same tier (assuming)
 }
 
 # Assume 50/50 split input/output tokens for our prompts
@@ -22,18 +22,8 @@ def calculate_cost_per_category(model, tokens):
     input_tokens = tokens * 0.5
     output_tokens = tokens * 0.5
 
-    if model == "gemini-2.5-flash-lite":
-        input_cost = (input_tokens / 1_000_000) * 0.075
-        output_cost = (output_tokens / 1_000_000) * 0.30
-    elif model == "gemini-2.5-flash":
-        input_cost = (input_tokens / 1_000_000) * 0.075
-        output_cost = (output_tokens / 1_000_000) * 0.30
-    elif model == "gemini-3-flash-preview":
-        # Same pricing as 2.5 (assuming)
-        input_cost = (input_tokens / 1_000_000) * 0.075
-        output_cost = (output_tokens / 1_000_000) * 0.30
-
-    return input_cost + output_cost
+    input_price, output_price = PRICING[model]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
 
 def format_cost(cents):
     """Format cost for display"""
@@ -42,11 +32,7 @@ def format_cost(cents):
     else:
         return f"${cents:.4f}"
 
-print("=" * 80)
-print("💰 JEOP3 GAME GENERATION: COST vs QUALITY ANALYSIS")
-print("=" * 80)
-
-models = [
+MODELS = [
     {
         "name": "Gemini 2.5 Flash Lite",
         "id": "gemini-2.5-flash-lite",
@@ -70,37 +56,7 @@ models = [
     },
 ]
 
-print(f"\n📊 PER CATEGORY (5 questions):")
-print("-" * 80)
-print(f"{'Model':<25} {'Time':<10} {'Tokens':<10} {'Cost':<12} {'Quality'}")
-print("-" * 80)
-
-for model in models:
-    time = model["time_per_category"]
-    tokens = model["tokens_per_category"]
-    cost = calculate_cost_per_category(model["id"], tokens)
-
-    print(f"{model['name']:<25} {time:>5.1f}s     {tokens:>6} tok   {format_cost(cost):<12} {model['quality']}")
-
-print("-" * 80)
-
-print(f"\n🎮 FULL GAME (6 categories = 30 questions):")
-print("-" * 80)
-print(f"{'Model':<25} {'Total Time':<12} {'Total Cost':<12} {'Cost Per Game'}")
-print("-" * 80)
-
-for model in models:
-    total_time = model["time_per_category"] * 6
-    total_cost = calculate_cost_per_category(model["id"], model["tokens_per_category"]) * 6
-
-    print(f"{model['name']:<25} {total_time:>6.1f}s      {format_cost(total_cost):<12} {format_cost(total_cost)}")
-
-print("-" * 80)
-
-print(f"\n📈 QUALITY vs TIME/COST:")
-print("-" * 80)
-
-print(f"""
+_TRADEOFFS = """
 Gemini 2.5 Flash Lite:
   ⚡ Fastest: ~10 seconds for a full game
   💸 Cheapest: ~0.08¢ per game
@@ -118,20 +74,16 @@ Gemini 3 Flash Preview:
   💸 Same cost: ~0.08¢ per game
   ★ Cleverest clues: Most interesting and creative
   → Use for: When you want the best user experience
-""")
+"""
 
-print(f"⏱️  TIME PERSPECTIVE:")
-print("-" * 80)
-print(f"""
+_TIME_PERSPECTIVE = """
   • Lite → 3 Flash: +9 seconds for a full game
   • User won't notice 9 seconds when creating a game
   • But they WILL notice better quality questions!
   • Cost is IDENTICAL (all ~0.08¢ per game)
-""")
+"""
 
-print(f"\n💡 RECOMMENDATION:")
-print("-" * 80)
-print(f"""
+_RECOMMENDATION = """
   🏆 Use Gemini 3 Flash Preview for production!
 
   Reasons:
@@ -142,6 +94,55 @@ print(f"""
   • Better user experience = happier players
 
   The time difference is negligible, but quality difference is significant.
-""")
+"""
+
+def main():
+    """Print the cost and quality comparison"""
+    print("=" * 80)
+    print("💰 JEOP3 GAME GENERATION: COST vs QUALITY ANALYSIS")
+    print("=" * 80)
+
+    print("\n📊 PER CATEGORY (5 questions):")
+    print("-" * 80)
+    print(f"{'Model':<25} {'Time':<10} {'Tokens':<10} {'Cost':<12} {'Quality'}")
+    print("-" * 80)
+
+    for model in MODELS:
+        time = model["time_per_category"]
+        tokens = model["tokens_per_category"]
+        cost = calculate_cost_per_category(model["id"], tokens)
+
+        print(f"{model['name']:<25} {time:>5.1f}s     {tokens:>6} tok   {format_cost(cost):<12} {model['quality']}")
+
+    print("-" * 80)
+
+    print("\n🎮 FULL GAME (6 categories = 30 questions):")
+    print("-" * 80)
+    print(f"{'Model':<25} {'Total Time':<12} {'Total Cost':<12} {'Cost Per Game'}")
+    print("-" * 80)
+
+    for model in MODELS:
+        total_time = model["time_per_category"] * 6
+        total_cost = calculate_cost_per_category(model["id"], model["tokens_per_category"]) * 6
+
+        print(f"{model['name']:<25} {total_time:>6.1f}s      {format_cost(total_cost):<12} {format_cost(total_cost)}")
+
+    print("-" * 80)
+
+    print("\n📈 QUALITY vs TIME/COST:")
+    print("-" * 80)
+
+    print(_TRADEOFFS)
+
+    print("⏱️  TIME PERSPECTIVE:")
+    print("-" * 80)
+    print(_TIME_PERSPECTIVE)
+
+    print("\n💡 RECOMMENDATION:")
+    print("-" * 80)
+    print(_RECOMMENDATION)
+
+    print("=" * 80)
 
-print("=" * 80)
+if __name__ == "__main__":
+    main()
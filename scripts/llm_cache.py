@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of LLM completions, shared by the benchmark scripts
+Identical requests (model, messages, sampling settings) are answered from
+.cache/llm/<sha256>.json instead of the API, so re-runs cost nothing
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import _fastjson
+from _http import stream_chat
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+CACHE_DIR = Path(__file__).parent.parent / ".cache" / "llm"
+CACHE_TTL = 7 * 24 * 60 * 60  # seconds; older entries are treated as misses
+
+# Set to False (--no-cache) to always call the API; nothing is read or written
+ENABLED = True
+
+def cache_key(request: Dict[str, Any]) -> str:
+    """Hash a request into a cache file name
+
+    The request is serialised as canonical JSON, so a "|" inside a prompt can't make
+    two different requests collide the way a delimiter-joined string could.
+    """
+    # Always stdlib json: orjson's output differs, and keys must not depend on what is installed
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+def load(key: str, include_batch: bool = False) -> Optional[Dict[str, Any]]:
+    """Return the cached completion for a key, or None if missing, expired, unreadable or disabled
+
+    Batch results carry no latencies, so they only count when include_batch is set;
+    otherwise a live run would report them as 0ms responses.
+    """
+    path = CACHE_DIR / f"{key}.json"
+    if not ENABLED or not path.exists() or time.time() - path.stat().st_mtime > CACHE_TTL:
+        return None
+
+    try:
+        completion = _fastjson.loads(path.read_bytes())
+    except (OSError, ValueError):
+        # Corrupt entry (e.g. a write cut short) - a miss, so the fresh result replaces it
+        return None
+    if completion.get("batch") and not include_batch:
+        return None
+    return completion
+
+def store(key: str, completion: Dict[str, Any]):
+    """Save a completion under a key"""
+    if not ENABLED:
+        return
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{key}.json"
+    # Write a temp file and rename it over the entry, so readers never see a partial file
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(_fastjson.dumps(completion))
+    os.replace(tmp_path, path)
+
+async def cached_chat(client: AsyncOpenAI, *, model: str, messages: list, **kwargs) -> Dict[str, Any]:
+    """Stream a chat completion unless an identical request is cached
+
+    Returns {"content", "prompt_tokens", "completion_tokens", "ttft", "elapsed", "attempts", "cached"}.
+    A cache hit reports the latencies recorded when the response was first fetched,
+    and 0 attempts. Results cached by a batch job are fetched again, since they have
+    no latencies to report.
+    """
+    key = cache_key({"model": model, "messages": messages, **kwargs})
+
+    completion = load(key)
+    if completion is not None:
+        completion["cached"] = True
+        completion["attempts"] = 0
+        return completion
+
+    completion = await stream_chat(client, model=model, messages=messages, **kwargs)
+    attempts = completion.pop("attempts")
+    store(key, completion)
+
+    completion["cached"] = False
+    completion["attempts"] = attempts
+    return completion
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Models known to the benchmark scripts, defined once
+Each script picks the models it runs with select(), so every comparison
+benchmarks exactly the same OpenRouter model ids
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+# Output token ceiling per category: five clues run ~200-340 completion tokens in
+# benchmark_results_20260122_085655.json. Models that reason before answering used
+# 1200-5200 there, so they set REASONING_MAX_TOKENS below.
+DEFAULT_MAX_TOKENS = 900
+REASONING_MAX_TOKENS = 2000
+
+@dataclass(frozen=True, slots=True)
+class ModelConfig:
+    """One model under test"""
+    id: str                       # short id used in reports and on the command line
+    name: str                     # display name
+    model: str                    # OpenRouter model id
+    provider: str = "openrouter"  # key into PROVIDER_ROUTES when the provider can be called directly
+    max_tokens: int = DEFAULT_MAX_TOKENS
+
+# Note: Check https://openrouter.ai/models for current model list and pricing
+ALL_MODELS: Dict[str, ModelConfig] = {m.id: m for m in (
+    ModelConfig("gemini-3-flash-preview", "Gemini 3 Flash Preview", "google/gemini-3-flash-preview"),
+    ModelConfig("gemini-2.5-flash-lite", "Gemini 2.5 Flash Lite", "google/gemini-2.5-flash-lite"),
+    ModelConfig("gemini-2.5-flash", "Gemini 2.5 Flash", "google/gemini-2.5-flash"),
+    # Reasoning models - completion tokens per test case in benchmark_results_20260122_085655.json
+    # are noted for each
+    ModelConfig("glm-4.7-flash", "GLM 4.7 Flash", "z-ai/glm-4.7-flash",  # 1587, 1208, 2000
+                provider="z-ai", max_tokens=REASONING_MAX_TOKENS),
+    ModelConfig("glm-4.7", "GLM 4.7", "z-ai/glm-4.7",  # 2138, 1565, 5180
+                provider="z-ai", max_tokens=REASONING_MAX_TOKENS),
+    ModelConfig("gpt-4o-mini", "GPT-4o Mini", "openai/gpt-4o-mini"),
+    ModelConfig("grok-4.1-fast", "Grok 4.1 Fast", "x-ai/grok-4.1-fast",  # 1463, 1753, 1289
+                max_tokens=REASONING_MAX_TOKENS),
+    ModelConfig("kimi-k2-thinking", "Kimi K2 Thinking", "moonshotai/kimi-k2-thinking",  # 2000, 1173, 2456
+                max_tokens=REASONING_MAX_TOKENS),
+)}
+
+def select(ids: Iterable[str]) -> List[ModelConfig]:
+    """Look up models by id, in the order given"""
+    return [ALL_MODELS[model_id] for model_id in ids]
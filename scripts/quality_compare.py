@@ -4,32 +4,39 @@ Side-by-side comparison of clue quality between models
 Shows actual generated clues for qualitative assessment
 """
 import os
+import re
 import sys
-import json
-import time
+import asyncio
+import argparse
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from benchmark_models import OpenAI, load_env, build_jeopardy_prompt, fetch_model_pricing
+import _fastjson
+import batch_run
+import llm_cache
+from run_log import RunLog, completion_token_ceilings, show_report
+from _clean import strip_fences
+from _http import close_async_clients
+from benchmark_models import (
+    load_env, build_jeopardy_prompt, build_multi_category_prompt, client_for,
+    fetch_model_pricing, get_client, max_tokens_for, TUNED_MAX_TOKENS
+)
+from model_registry import select
 
 # Models to compare
-MODELS_TO_COMPARE = [
-    {
-        "id": "gemini-2.5-flash-lite",
-        "name": "Gemini 2.5 Flash Lite",
-        "model": "google/gemini-2.5-flash-lite"
-    },
-    {
-        "id": "gemini-2.5-flash",
-        "name": "Gemini 2.5 Flash",
-        "model": "google/gemini-2.5-flash"
-    },
-    {
-        "id": "gemini-3-flash-preview",
-        "name": "Gemini 3 Flash Preview",
-        "model": "google/gemini-3-flash-preview"
-    },
-]
+MODELS_TO_COMPARE = select([
+    "gemini-2.5-flash-lite",
+    "gemini-2.5-flash",
+    "gemini-3-flash-preview",
+])
+
+# Max API requests in flight at once
+MAX_CONCURRENT = 8
+
+# --batch-categories: categories share a request only while the expected output stays
+# under this many tokens - past that, one long sequential decode loses to parallel requests
+MAX_BATCH_OUTPUT_TOKENS = 1500
+OUTPUT_TOKENS_PER_CATEGORY = 500
 
 # Test categories for quality comparison
 TEST_CATEGORIES = [
@@ -56,19 +63,59 @@ TEST_CATEGORIES = [
     },
 ]
 
-def clean_response(response_text):
-    """Clean markdown code blocks from response"""
-    if response_text.startswith("```"):
-        lines = response_text.split("\n")
-        if len(lines) > 1 and lines[0].startswith("```"):
-            response_text = "\n".join(lines[1:])
-        if response_text.endswith("```"):
-            response_text = response_text[:-3].strip()
-    return response_text
-
-def generate_clues(client, model_config, category):
-    """Generate clues for a category"""
-    prompt = build_jeopardy_prompt(
+# Phrasing typical of Jeopardy clues ("this president", "known as"), matched as whole words
+_JEOPARDY_RE = re.compile(r"\b(?:this|these|who|what|where|for|known as)\b", re.IGNORECASE)
+
+def chat_request(model_id, system, prompt, max_tokens):
+    """Build a chat completion request - shared by live and batch runs so both hit the same cache entry"""
+    return {
+        "model": model_id,
+        "messages": [
+            {
+                "role": "system",
+                "content": system
+            },
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": max_tokens,
+    }
+
+def parse_json(completion):
+    """Parse a completion's JSON reply"""
+    return _fastjson.loads(strip_fences(completion["content"]))
+
+async def request_json(model_config, system, prompt, semaphore, categories=1):
+    """Send one prompt (through the response cache) and parse the JSON reply"""
+    client, model_id = client_for(model_config)
+    max_tokens = max_tokens_for(model_config, categories)
+    async with semaphore:
+        completion = await llm_cache.cached_chat(client, **chat_request(model_id, system, prompt, max_tokens))
+    return parse_json(completion), completion
+
+def clues_result(clues, completion):
+    """Build the result record for clues generated by a completion"""
+    return {
+        "success": True,
+        "cached": completion["cached"],
+        "clues": clues,
+        "prompt_tokens": completion["prompt_tokens"],
+        "completion_tokens": completion["completion_tokens"],
+        "ttft_ms": completion["ttft"] * 1000 if completion.get("ttft") is not None else None,
+        "time_ms": completion["elapsed"] * 1000
+    }
+
+def failed_clues(error):
+    """Build the result record for a category that produced no clues"""
+    return {
+        "success": False,
+        "error": str(error),
+        "clues": []
+    }
+
+def category_prompt(category):
+    """Build the (system, user) prompt for one category"""
+    return build_jeopardy_prompt(
         category=category["name"],
         content_topic=category["content_topic"],
         theme=category["theme"],
@@ -76,35 +123,69 @@ def generate_clues(client, model_config, category):
         reference_material=category["reference_material"]
     )
 
+async def generate_clues(model_config, category, semaphore):
+    """Generate clues for a category"""
+    system, prompt = category_prompt(category)
+
     try:
-        start = time.time()
-        response = client.chat.completions.create(
-            model=model_config["model"],
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a Jeopardy game content generator. Always respond with valid JSON only, no prose. No markdown, no explanations, just raw JSON."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-        )
-        elapsed = time.time() - start
-        response_text = clean_response(response.choices[0].message.content or "")
-
-        data = json.loads(response_text)
-        return {
-            "success": True,
-            "clues": data.get("clues", []),
-            "time_ms": elapsed * 1000
-        }
+        data, completion = await request_json(model_config, system, prompt, semaphore)
+        return clues_result(data.get("clues", []), completion)
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "clues": []
+        return failed_clues(e)
+
+async def run_batch(pairs, input_path):
+    """Generate clues for every (category, model) pair in one Batch API job, returning results in the order of pairs"""
+    requests = {
+        f"{model.id}::{i}": chat_request(model.model, *category_prompt(category), max_tokens_for(model))
+        for i, (category, model) in enumerate(pairs)
+    }
+    completions = await batch_run.run_batch(get_client(), requests, input_path)
+
+    outcomes = []
+    for custom_id in requests:
+        completion = completions[custom_id]
+        if "error" in completion:
+            outcomes.append(failed_clues(completion["error"]))
+            continue
+        try:
+            outcomes.append(clues_result(parse_json(completion).get("clues", []), completion))
+        except Exception as e:
+            outcomes.append(failed_clues(e))
+    return outcomes
+
+async def generate_clue_batch(model_config, categories, semaphore):
+    """Generate clues for several categories in one request, returning one result per category"""
+    system, prompt = build_multi_category_prompt([
+        {
+            "category": category["name"],
+            "content_topic": category["content_topic"],
+            "theme": category["theme"],
+            "difficulty": category["difficulty"],
+            "reference_material": category["reference_material"]
         }
+        for category in categories
+    ])
+
+    try:
+        data, completion = await request_json(model_config, system, prompt, semaphore, len(categories))
+    except Exception as e:
+        return [failed_clues(e) for _ in categories]
+
+    if not isinstance(data, dict) or not isinstance(data.get("categories"), list):
+        return [failed_clues('response is not a {"categories": [...]} object') for _ in categories]
+
+    # Categories come back in the order they were asked for
+    returned = data["categories"]
+    results = []
+    for i in range(len(categories)):
+        category = returned[i] if i < len(returned) else None
+        clues = category.get("clues") if isinstance(category, dict) else None
+        if clues and isinstance(clues, list):
+            # Token counts cover the whole request, shared by batch_size categories
+            results.append({**clues_result(clues, completion), "batch_size": len(categories)})
+        else:
+            results.append(failed_clues("category missing from response"))
+    return results
 
 def print_comparison(category_name, results):
     """Print side-by-side comparison for a category"""
@@ -113,21 +194,26 @@ def print_comparison(category_name, results):
     print(f"📂 CATEGORY: {category_name}")
     print(f"{'=' * 140}")
 
+    # Index each model's clues by value once, rather than scanning them for every value.
+    # reversed() keeps the first clue when a model repeats a value.
+    by_model = [
+        (model_result["model"].name, {c.get("value"): c for c in reversed(model_result["clues"])})
+        for model_result in results
+    ]
+
     # For each value level (200, 400, 600, 800, 1000)
     for value in [200, 400, 600, 800, 1000]:
         print(f"\n{'─' * 140}")
         print(f"  💰 ${value} CLUES")
         print(f"{'─' * 140}")
 
-        for model_result in results:
-            model_name = model_result["model"]["name"]
-            clues = model_result["clues"]
-
-            # Find the clue for this value
-            clue = next((c for c in clues if c.get("value") == value), None)
+        for model_name, by_value in by_model:
+            clue = by_value.get(value)
 
             if clue:
-                clue_text = clue.get("clue", "")[:70] + "..." if len(clue.get("clue", "")) > 70 else clue.get("clue", "")
+                clue_text = clue.get("clue", "")
+                if len(clue_text) > 70:
+                    clue_text = clue_text[:70] + "..."
                 answer = clue.get("response", "")
 
                 print(f"\n  🤖 {model_name}")
@@ -152,7 +238,7 @@ def assess_quality(results):
         print(f"📂 {category_name}:\n")
 
         for model_data in models_data:
-            model_name = model_data["model"]["name"]
+            model_name = model_data["model"].name
             clues = model_data["clues"]
 
             if not clues:
@@ -162,35 +248,60 @@ def assess_quality(results):
             # Quality criteria
             print(f"  🤖 {model_name}:")
 
+            # Answers, clue lengths and Jeopardy phrasing in one pass
+            answers = set()
+            length_sum = 0
+            jeopardy_style_count = 0
+            for c in clues:
+                clue_text = c.get("clue", "")
+                answers.add(c.get("response", "").lower().strip())
+                length_sum += len(clue_text)
+                if _JEOPARDY_RE.search(clue_text):
+                    jeopardy_style_count += 1
+
             # 1. Variety - are answers unique?
-            answers = [c.get("response", "").lower().strip() for c in clues]
-            unique_answers = len(set(answers))
+            unique_answers = len(answers)
             print(f"     Variety: {unique_answers}/5 unique answers")
 
             # 2. Clue length - Jeopardy clues should be concise but descriptive
-            avg_length = sum(len(c.get("clue", "")) for c in clues) / len(clues)
+            avg_length = length_sum / len(clues)
             print(f"     Clue Length: avg {avg_length:.0f} chars {'✓' if 40 < avg_length < 150 else '⚠️'}")
 
             # 3. Value appropriateness - check if clues match difficulty
             # (Simple heuristic: longer clues often = harder/more detail)
             print(f"     Value Progression: {clues[0].get('clue', '')[:40]}... → {clues[-1].get('clue', '')[:40]}...")
 
-            # 4. Jeopardy-ness - do clues sound like Jeopardy?
-            # Check for common Jeopardy patterns
-            jeopardy_style_count = 0
-            for clue in clues:
-                clue_text = clue.get("clue", "")
-                # Good indicators
-                if any(phrase in clue_text.lower() for phrase in ["this", "these", "who", "what", "where", "for", "known as"]):
-                    jeopardy_style_count += 1
+            # 4. Jeopardy-ness - do clues sound like Jeopardy? (common Jeopardy patterns)
             print(f"     Jeopardy Style: {jeopardy_style_count}/5 clues {'✓' if jeopardy_style_count >= 4 else '⚠️'}")
 
             print()
 
-def main():
+def parse_args() -> argparse.Namespace:
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Compare clue quality side by side between models")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore cached responses and call the API for every request")
+    parser.add_argument("--batch-categories", action="store_true",
+                        help=f"ask each model for several categories per request (up to ~{MAX_BATCH_OUTPUT_TOKENS} "
+                             "output tokens) instead of one request per category")
+    parser.add_argument("--pretty", action="store_true",
+                        help="print the side-by-side report even when stdout is not a terminal")
+    parser.add_argument("--auto-max-tokens", action="store_true",
+                        help="set each model's max_tokens from past runs in .cache/runs (p99 of observed + 10%%)")
+    parser.add_argument("--batch", action="store_true",
+                        help="submit all requests as one Batch API job and wait for it (cheaper, can take hours; "
+                             "needs an endpoint with /v1/batches)")
+    return parser.parse_args()
+
+async def main():
+    args = parse_args()
+    llm_cache.ENABLED = not args.no_cache
+    if args.batch and args.batch_categories:
+        print("❌ Error: --batch and --batch-categories can't be combined")
+        return
+
     env = load_env()
     api_key = env.get('OPENROUTER_API_KEY', '')
-    base_url = env.get('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
 
     if not api_key:
         print("❌ Error: OPENROUTER_API_KEY not found in .env file")
@@ -202,45 +313,82 @@ def main():
     print("Focus on actual question quality, creativity, and Jeopardy-style\n")
 
     fetch_model_pricing()
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    if args.auto_max_tokens:
+        TUNED_MAX_TOKENS.update(completion_token_ceilings())
+        print(f"📏 max_tokens from past runs: {TUNED_MAX_TOKENS or 'not enough data yet'}")
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+
+    # Every request runs at once, so the wait is the slowest call, not the sum
+    print(f"\n⏳ Generating clues for {len(TEST_CATEGORIES)} categories x {len(MODELS_TO_COMPARE)} models...")
+    run_log = RunLog("quality_compare")
+    if args.batch:
+        pairs = [(category, model) for category in TEST_CATEGORIES for model in MODELS_TO_COMPARE]
+        outcomes = await run_batch(pairs, run_log.path.with_suffix(".batch_input.jsonl"))
+    elif args.batch_categories:
+        group_size = max(1, MAX_BATCH_OUTPUT_TOKENS // OUTPUT_TOKENS_PER_CATEGORY)
+        groups = [TEST_CATEGORIES[i:i + group_size] for i in range(0, len(TEST_CATEGORIES), group_size)]
+        batches = await asyncio.gather(
+            *(generate_clue_batch(model, group, semaphore) for group in groups for model in MODELS_TO_COMPARE)
+        )
+        # Reorder the per-category results to match the one-request-per-category layout
+        by_pair = {}
+        batch_results = iter(batches)
+        for group in groups:
+            for model in MODELS_TO_COMPARE:
+                for category, result in zip(group, next(batch_results)):
+                    by_pair[(category["name"], model.id)] = result
+        outcomes = [by_pair[(category["name"], model.id)]
+                    for category in TEST_CATEGORIES for model in MODELS_TO_COMPARE]
+    else:
+        pairs = [(category, model) for category in TEST_CATEGORIES for model in MODELS_TO_COMPARE]
+        outcomes = await asyncio.gather(
+            *(generate_clues(model, category, semaphore) for category, model in pairs)
+        )
+    await close_async_clients()
 
+    # gather() keeps submission order, so each category's results are a contiguous slice
     all_results = []
-
-    for category in TEST_CATEGORIES:
-        print(f"\n⏳ Generating clues for: {category['name']}...")
-
-        category_results = {
-            "category": category["name"],
-            "models": []
-        }
-
-        for model in MODELS_TO_COMPARE:
-            print(f"   → {model['name']}...", end="", flush=True)
-            result = generate_clues(client, model, category)
-
-            category_results["models"].append({
-                "model": model,
-                "clues": result.get("clues", []),
-                "success": result["success"]
-            })
-
-            if result["success"]:
-                print(f" ✓ ({result['time_ms']:.0f}ms)")
-            else:
-                print(f" ✗ FAILED")
-
-        all_results.append(category_results)
-
-    # Print side-by-side comparisons
-    for category_result in all_results:
-        print_comparison(category_result["category"], category_result["models"])
-
-    # Quality assessment
-    assess_quality(all_results)
+    per_category = len(MODELS_TO_COMPARE)
+
+    with run_log:
+        for i, category in enumerate(TEST_CATEGORIES):
+            print(f"\n📂 {category['name']}")
+            category_results = {
+                "category": category["name"],
+                "models": []
+            }
+
+            for model, result in zip(MODELS_TO_COMPARE, outcomes[i * per_category:(i + 1) * per_category]):
+                run_log.emit({"category": category["name"], "model_id": model.id, "model": model.model, **result})
+                category_results["models"].append({
+                    "model": model,
+                    "clues": result.get("clues", []),
+                    "success": result["success"]
+                })
+
+                if result["success"]:
+                    ttft = f"TTFT {result['ttft_ms']:.0f}ms, " if result["ttft_ms"] is not None else ""
+                    cached = ", cached" if result["cached"] else ""
+                    print(f"   → {model.name}... ✓ ({ttft}{result['time_ms']:.0f}ms total{cached})")
+                else:
+                    print(f"   → {model.name}... ✗ FAILED")
+
+            all_results.append(category_results)
+
+    print(f"\n📝 Results: {run_log.path}")
+
+    # The report is for reading - piped or captured runs can use the JSONL instead
+    if show_report(args.pretty):
+        # Print side-by-side comparisons
+        for category_result in all_results:
+            print_comparison(category_result["category"], category_result["models"])
+
+        # Quality assessment
+        assess_quality(all_results)
 
     print(f"\n{'=' * 140}")
     print("✅ Comparison complete!")
     print(f"{'=' * 140}\n")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -4,133 +4,138 @@ Quick comparison of top models
 """
 import os
 import sys
-import time
+import heapq
+import asyncio
+import argparse
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
+import batch_run
+import llm_cache
+from run_log import RunLog, completion_token_ceilings, show_report
+from _clean import strip_fences
+from _http import close_async_clients
 from benchmark_models import (
-    OpenAI, load_env, build_jeopardy_prompt, evaluate_response,
-    fetch_model_pricing, format_cost, MODELS, TEST_CASES
+    load_env, build_jeopardy_prompt, client_for, evaluate_response, get_client,
+    fetch_model_pricing, format_cost, max_tokens_for, TEST_CASES, TUNED_MAX_TOKENS
 )
+from model_registry import select
 
 # Top models to compare
-COMPARE_MODELS = [
-    {
-        "id": "gemini-3-flash-preview",
-        "name": "Gemini 3 Flash Preview",
-        "model": "google/gemini-3-flash-preview"
-    },
-    {
-        "id": "gemini-2.5-flash-lite",
-        "name": "Gemini 2.5 Flash Lite",
-        "model": "google/gemini-2.5-flash-lite"
-    },
-    {
-        "id": "gemini-2.5-flash",
-        "name": "Gemini 2.5 Flash",
-        "model": "google/gemini-2.5-flash"
-    },
-    {
-        "id": "gpt-4o-mini",
-        "name": "GPT-4o Mini",
-        "model": "openai/gpt-4o-mini"
-    },
-    {
-        "id": "grok-4.1-fast",
-        "name": "Grok 4.1 Fast",
-        "model": "x-ai/grok-4.1-fast"
-    },
-]
-
-def main():
-    env = load_env()
-    api_key = env.get('OPENROUTER_API_KEY', '')
-    base_url = env.get('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-
-    if not api_key:
-        print("❌ Error: OPENROUTER_API_KEY not found in .env file")
-        return
-
-    print("🔥 QUICK SHOWDOWN: Top Models Comparison")
-    print("=" * 60)
-    fetch_model_pricing()
-
-    client = OpenAI(api_key=api_key, base_url=base_url)
-
-    results = {}
-
-    for model in COMPARE_MODELS:
-        print(f"\n🧪 {model['name']}...")
-        model_results = []
-
-        for test_case in TEST_CASES:
-            prompt = build_jeopardy_prompt(
-                category=test_case["category"],
-                content_topic=test_case["content_topic"],
-                theme=test_case["theme"],
-                difficulty=test_case["difficulty"],
-                reference_material=test_case["reference_material"]
-            )
-
-            try:
-                start = time.time()
-                response = client.chat.completions.create(
-                    model=model["model"],
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a Jeopardy game content generator. Always respond with valid JSON only, no prose. No markdown, no explanations, just raw JSON."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000,
-                )
-                elapsed = time.time() - start
-                response_text = response.choices[0].message.content or ""
-
-                # Clean response
-                if response_text.startswith("```"):
-                    lines = response_text.split("\n")
-                    if len(lines) > 1 and lines[0].startswith("```"):
-                        response_text = "\n".join(lines[1:])
-                    if response_text.endswith("```"):
-                        response_text = response_text[:-3].strip()
-
-                usage = response.usage
-                prompt_tokens = usage.prompt_tokens if usage else 0
-                completion_tokens = usage.completion_tokens if usage else 0
-
-                evaluation = evaluate_response(
-                    response_text, [200, 400, 600, 800, 1000], elapsed,
-                    model=model["model"],
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens
-                )
-
-                model_results.append({
-                    "success": True,
-                    "evaluation": evaluation,
-                    "test_name": test_case["name"]
-                })
-
-                print(f"   ✓ {test_case['name']}: {evaluation['quality_score']}/10 "
-                      f"({evaluation['response_time_ms']:.0f}ms, {evaluation['token_usage']['total_tokens']} tokens)")
-
-            except Exception as e:
-                print(f"   ✗ {test_case['name']}: {str(e)[:50]}")
-                model_results.append({
-                    "success": False,
-                    "error": str(e),
-                    "test_name": test_case["name"]
-                })
-
-        results[model["id"]] = {
-            "name": model["name"],
-            "results": model_results
-        }
-
-    # Print summary
+COMPARE_MODELS = select([
+    "gemini-3-flash-preview",
+    "gemini-2.5-flash-lite",
+    "gemini-2.5-flash",
+    "gpt-4o-mini",
+    "grok-4.1-fast",
+])
+
+# Max API requests in flight at once
+MAX_CONCURRENT = 8
+
+def chat_request(model_id, test_case, max_tokens):
+    """Build the chat completion request for one test - shared by live and batch runs so both hit the same cache entry"""
+    system, prompt = build_jeopardy_prompt(
+        category=test_case["category"],
+        content_topic=test_case["content_topic"],
+        theme=test_case["theme"],
+        difficulty=test_case["difficulty"],
+        reference_material=test_case["reference_material"]
+    )
+
+    return {
+        "model": model_id,
+        "messages": [
+            {
+                "role": "system",
+                "content": system
+            },
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": max_tokens,
+    }
+
+def failed_test(test_case, error):
+    """Result record for a test that produced no response"""
+    return {
+        "success": False,
+        "error": str(error),
+        "test_name": test_case["name"]
+    }
+
+def score_test(model, test_case, completion):
+    """Evaluate one completion into a test result"""
+    # A cache hit reports the latency recorded when the response was first fetched
+    elapsed = completion["elapsed"]
+    response_text = strip_fences(completion["content"])
+
+    prompt_tokens = completion["prompt_tokens"]
+    completion_tokens = completion["completion_tokens"]
+
+    evaluation = evaluate_response(
+        response_text, [200, 400, 600, 800, 1000], elapsed,
+        model=model.model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        ttft=completion.get("ttft")
+    )
+
+    return {
+        "success": True,
+        "cached": completion["cached"],
+        "evaluation": evaluation,
+        "test_name": test_case["name"]
+    }
+
+async def run_test(model, test_case, semaphore):
+    """Run one model on one test case"""
+    client, model_id = client_for(model)
+
+    try:
+        async with semaphore:
+            completion = await llm_cache.cached_chat(client, **chat_request(model_id, test_case, max_tokens_for(model)))
+        return score_test(model, test_case, completion)
+
+    except Exception as e:
+        return failed_test(test_case, e)
+
+async def run_batch(pairs, input_path):
+    """Run every (model, test case) pair as one Batch API job, returning results in the order of pairs"""
+    requests = {
+        f"{model.id}::{i}": chat_request(model.model, test_case, max_tokens_for(model))
+        for i, (model, test_case) in enumerate(pairs)
+    }
+    completions = await batch_run.run_batch(get_client(), requests, input_path)
+
+    outcomes = []
+    for custom_id, (model, test_case) in zip(requests, pairs):
+        completion = completions[custom_id]
+        if "error" in completion:
+            outcomes.append(failed_test(test_case, completion["error"]))
+            continue
+        try:
+            outcomes.append(score_test(model, test_case, completion))
+        except Exception as e:
+            outcomes.append(failed_test(test_case, e))
+    return outcomes
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Quick comparison of the top models")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore cached responses and call the API for every test")
+    parser.add_argument("--pretty", action="store_true",
+                        help="print the summary tables even when stdout is not a terminal")
+    parser.add_argument("--auto-max-tokens", action="store_true",
+                        help="set each model's max_tokens from past runs in .cache/runs (p99 of observed + 10%%)")
+    parser.add_argument("--batch", action="store_true",
+                        help="submit all tests as one Batch API job and wait for it (cheaper, can take hours; "
+                             "needs an endpoint with /v1/batches)")
+    return parser.parse_args()
+
+def print_summary(results):
+    """Print the per-model averages and rankings"""
     print("\n" + "=" * 70)
     print("📊 FINAL SHOWDOWN RESULTS")
     print("=" * 70)
@@ -140,11 +145,22 @@ def main():
 
     rankings = []
     for model_id, data in results.items():
-        valid_results = [r for r in data["results"] if r["success"]]
-        avg_quality = sum(r["evaluation"]["quality_score"] for r in valid_results) / len(valid_results) if valid_results else 0
-        avg_time = sum(r["evaluation"]["response_time_ms"] for r in valid_results) / len(valid_results) if valid_results else 0
-        avg_tokens = sum(r["evaluation"]["token_usage"]["total_tokens"] for r in valid_results) / len(valid_results) if valid_results else 0
-        success_rate = len(valid_results) / len(data["results"])
+        # One pass over the results for all three averages
+        valid = 0
+        quality_sum = time_sum = tokens_sum = 0
+        for r in data["results"]:
+            if not r["success"]:
+                continue
+            evaluation = r["evaluation"]
+            valid += 1
+            quality_sum += evaluation["quality_score"]
+            time_sum += evaluation["response_time_ms"]
+            tokens_sum += evaluation["token_usage"]["total_tokens"]
+
+        avg_quality = quality_sum / valid if valid else 0
+        avg_time = time_sum / valid if valid else 0
+        avg_tokens = tokens_sum / valid if valid else 0
+        success_rate = valid / len(data["results"])
 
         rankings.append({
             "name": data["name"],
@@ -164,11 +180,72 @@ def main():
         print(f"   {i}. {r['name']}: {r['avg_quality']:.1f}/10 ({r['avg_time']:.0f}ms)")
 
     print("\n⚡ FASTEST:")
-    rankings.sort(key=lambda x: x["avg_time"])
-    for i, r in enumerate(rankings[:3], 1):
+    for i, r in enumerate(heapq.nsmallest(3, rankings, key=lambda x: x["avg_time"]), 1):
         print(f"   {i}. {r['name']}: {r['avg_time']:.0f}ms ({r['avg_quality']:.1f}/10)")
 
     print("\n" + "=" * 70)
 
+async def main():
+    args = parse_args()
+    llm_cache.ENABLED = not args.no_cache
+
+    env = load_env()
+    api_key = env.get('OPENROUTER_API_KEY', '')
+
+    if not api_key:
+        print("❌ Error: OPENROUTER_API_KEY not found in .env file")
+        return
+
+    print("🔥 QUICK SHOWDOWN: Top Models Comparison")
+    print("=" * 60)
+    fetch_model_pricing()
+    if args.auto_max_tokens:
+        TUNED_MAX_TOKENS.update(completion_token_ceilings())
+        print(f"📏 max_tokens from past runs: {TUNED_MAX_TOKENS or 'not enough data yet'}")
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+
+    run_log = RunLog("quick_compare")
+    pairs = [(model, test_case) for model in COMPARE_MODELS for test_case in TEST_CASES]
+    if args.batch:
+        print(f"\n📦 Running {len(pairs)} tests as one batch job...")
+        outcomes = await run_batch(pairs, run_log.path.with_suffix(".batch_input.jsonl"))
+    else:
+        # Every model x test case request runs at once, so the wait is the slowest call, not the sum
+        outcomes = await asyncio.gather(
+            *(run_test(model, test_case, semaphore) for model, test_case in pairs)
+        )
+    await close_async_clients()
+
+    # gather() keeps submission order, so each model's results are a contiguous slice
+    results = {}
+    per_model = len(TEST_CASES)
+
+    with run_log:
+        for i, model in enumerate(COMPARE_MODELS):
+            print(f"\n🧪 {model.name}...")
+            model_results = outcomes[i * per_model:(i + 1) * per_model]
+
+            for result in model_results:
+                run_log.emit({"model_id": model.id, "model": model.model, **result})
+                if result["success"]:
+                    evaluation = result["evaluation"]
+                    ttft = f"TTFT {evaluation['ttft_ms']:.0f}ms, " if evaluation["ttft_ms"] is not None else ""
+                    print(f"   ✓ {result['test_name']}: {evaluation['quality_score']}/10 "
+                          f"({ttft}{evaluation['response_time_ms']:.0f}ms, {evaluation['token_usage']['total_tokens']} tokens)")
+                else:
+                    print(f"   ✗ {result['test_name']}: {result['error'][:50]}")
+
+            results[model.id] = {
+                "name": model.name,
+                "results": model_results
+            }
+
+    print(f"\n📝 Results: {run_log.path}")
+
+    # The tables are for reading - piped or captured runs can use the JSONL instead
+    if show_report(args.pretty):
+        print_summary(results)
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -6,48 +6,44 @@ Useful for verifying API key and testing new models
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 
 # Add scripts directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from _clean import strip_fences
+from _http import close_async_clients, stream_chat
+from model_registry import ALL_MODELS
 from benchmark_models import (
-    MODELS, TEST_CASES, OpenAI, load_env, build_jeopardy_prompt,
-    evaluate_response, fetch_model_pricing, format_cost
+    TEST_CASES, load_env, build_jeopardy_prompt, client_for,
+    evaluate_response, fetch_model_pricing, format_cost, max_tokens_for
 )
 
 # Quick test configuration
-# Change index to test different models:
-# 0 = Gemini 3 Flash Preview
-# 1 = Gemini 2.5 Flash Lite
-# 2 = Gemini 2.5 Flash
-# 3 = GLM 4.7 Flash
-# 4 = GLM 4.7
-# 5 = GPT-4o Mini
-# 6 = Grok 4.1 Fast
-# 7 = Kimi K2 Thinking
-TEST_MODEL = MODELS[0]  # Gemini 3 Flash Preview
+# Change the id to test a different model (see ALL_MODELS in model_registry.py)
+TEST_MODEL = ALL_MODELS["gemini-3-flash-preview"]
 TEST_CASE = TEST_CASES[0]  # First test case: Simple Category
 
-def main():
+async def main():
     env = load_env()
     api_key = env.get('OPENROUTER_API_KEY', '')
-    base_url = env.get('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
 
     if not api_key:
         print("❌ Error: OPENROUTER_API_KEY not found in .env file")
         return
 
-    print(f"🧪 Quick Test: {TEST_MODEL['name']}")
+    print(f"🧪 Quick Test: {TEST_MODEL.name}")
     print(f"📝 Test Case: {TEST_CASE['name']}")
     print(f"📂 Category: {TEST_CASE['category']}\n")
 
     # Fetch pricing
     fetch_model_pricing()
 
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    client, model_id = client_for(TEST_MODEL)
+    print(f"🌐 Endpoint: {client.base_url}\n")
 
-    prompt = build_jeopardy_prompt(
+    system, prompt = build_jeopardy_prompt(
         category=TEST_CASE["category"],
         content_topic=TEST_CASE["content_topic"],
         theme=TEST_CASE["theme"],
@@ -58,39 +54,34 @@ def main():
     print("Sending request...\n")
 
     try:
-        import time
-        start = time.time()
-        response = client.chat.completions.create(
-            model=TEST_MODEL["model"],
+        completion = await stream_chat(
+            client,
+            model=model_id,
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a Jeopardy game content generator. Always respond with valid JSON only, no prose."
+                    "content": system
                 },
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=2000,
+            max_tokens=max_tokens_for(TEST_MODEL),
         )
-        elapsed = time.time() - start
+        elapsed = completion["elapsed"]
+        ttft = completion["ttft"]
 
-        response_text = response.choices[0].message.content or ""
+        response_text = completion["content"]
 
         # Extract token usage
-        usage = response.usage
-        prompt_tokens = usage.prompt_tokens if usage else 0
-        completion_tokens = usage.completion_tokens if usage else 0
+        prompt_tokens = completion["prompt_tokens"]
+        completion_tokens = completion["completion_tokens"]
 
         # Clean response
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            if len(lines) > 1 and lines[0].startswith("```"):
-                response_text = "\n".join(lines[1:])
-            if response_text.endswith("```"):
-                response_text = response_text[:-3].strip()
+        response_text = strip_fences(response_text)
 
         print("✅ Response received!")
-        print(f"⏱️  Time: {elapsed*1000:.0f}ms\n")
+        first_token = f" (first token after {ttft*1000:.0f}ms)" if ttft is not None else ""
+        print(f"⏱️  Time: {elapsed*1000:.0f}ms{first_token}\n")
         print("Raw Response:")
         print("-" * 60)
         print(response_text[:1000])
@@ -102,9 +93,10 @@ def main():
             response_text,
             [200, 400, 600, 800, 1000],
             elapsed,
-            model=TEST_MODEL["model"],
+            model=TEST_MODEL.model,
             prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens
+            completion_tokens=completion_tokens,
+            ttft=ttft
         )
 
         print("\n📊 Evaluation:")
@@ -129,5 +121,8 @@ def main():
     except Exception as e:
         print(f"❌ Error: {e}")
 
+    finally:
+        await close_async_clients()
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
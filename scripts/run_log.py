@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Machine-readable run logs for the comparison scripts
+Every result is appended as one JSON line to .cache/runs/<script>_<timestamp>.jsonl,
+so runs can be analysed or diffed without re-running or scraping the printed report
+"""
+from __future__ import annotations
+
+import math
+import statistics
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import _fastjson
+
+RUNS_DIR = Path(__file__).parent.parent / ".cache" / "runs"
+
+def show_report(pretty: bool = False) -> bool:
+    """Whether to print the human-readable report: on a terminal, or when asked with --pretty"""
+    return pretty or sys.stdout.isatty()
+
+class RunLog:
+    """Append-only JSONL file for one script run; use as a context manager"""
+
+    def __init__(self, script: str):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = RUNS_DIR / f"{script}_{timestamp}.jsonl"
+        self._file = None
+
+    def __enter__(self) -> RunLog:
+        RUNS_DIR.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def emit(self, record: Dict[str, Any]):
+        """Write one result as a JSON line"""
+        self._file.write(_fastjson.dumps(record) + b"\n")
+
+def read_runs() -> Iterator[Dict[str, Any]]:
+    """Yield every result record from the run logs, oldest file first"""
+    for path in sorted(RUNS_DIR.glob("*.jsonl")):
+        if path.name.endswith(".batch_input.jsonl"):
+            continue
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield _fastjson.loads(line)
+
+def completion_token_ceilings(min_samples: int = 20, headroom: float = 1.1) -> Dict[str, int]:
+    """Per-model max_tokens from past runs: the p99 of observed completion tokens per category, plus headroom
+
+    Only fresh successful responses count (a cache hit repeats an earlier sample), and a
+    multi-category request's tokens are split across its categories. Models with fewer
+    than min_samples responses are left out.
+    """
+    samples = defaultdict(list)
+    for record in read_runs():
+        if not record.get("success") or record.get("cached"):
+            continue
+        tokens = record.get("completion_tokens")
+        if tokens is None:
+            tokens = record.get("evaluation", {}).get("token_usage", {}).get("completion_tokens")
+        if tokens:
+            samples[record["model"]].append(tokens / record.get("batch_size", 1))
+
+    ceilings = {}
+    for model, observed in samples.items():
+        if len(observed) >= min_samples:
+            p99 = statistics.quantiles(observed, n=100, method="inclusive")[98]
+            # Round up to a multiple of 100 so new runs rarely change the value - it's part of the cache key
+            ceilings[model] = math.ceil(p99 * headroom / 100) * 100
+    return ceilings